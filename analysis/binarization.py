@@ -1,14 +1,25 @@
 import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Sequence, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy import ndimage
-from skimage.measure import label, regionprops
 from skimage import io, color, filters, measure, morphology
 from utils.setup import setup_csv_writer
-from utils.analysis import inv, group_avg, binarize, top_ten_average
+from utils.analysis import (
+    group_avg,
+    group_avg_stack,
+    binarize,
+    binarize_stack,
+    plane_structure,
+    remove_small_objects_stack,
+    top_ten_average,
+)
+from utils.reader import get_channel
 from core import BinarizationConfig, OutputConfig, BinarizationResults
 from utils import vprint
 
@@ -22,75 +33,67 @@ class FrameMetrics:
     island_position: Optional[Tuple[float, float]]
     is_connected: bool
     void_area: float
-    regions: List
 
 
-def check_span(frame):
-    def check_connected(frame, axis=0):
-        # Ensures that either connected across left-right or up-down axis
-        if not axis in [0, 1]:
-            raise Exception("Axis must be 0 or 1.")
+# Islands and voids are connected components with connectivity 2 (8-neighbour)
+CONNECTIVITY_STRUCTURE = ndimage.generate_binary_structure(2, 2)
 
-        struct = ndimage.generate_binary_structure(2, 2)
 
-        frame_connections, num_features = ndimage.label(input=frame, structure=struct)
-
-        if axis == 0:
-            labeled_first = np.unique(frame_connections[0, :])
-            labeled_last = np.unique(frame_connections[-1, :])
-
-        if axis == 1:
-            labeled_first = np.unique(frame_connections[:, 0])
-            labeled_last = np.unique(frame_connections[:, -1])
-
-        labeled_first = set(labeled_first[labeled_first != 0])
-        labeled_last = set(labeled_last[labeled_last != 0])
-
-        if labeled_first.intersection(labeled_last):
-            return 1
-        else:
-            return 0
-
-    return check_connected(frame, axis=0) or check_connected(frame, axis=1)
-
-
-def find_largest_void(frame: np.ndarray, find_void: bool, num: int = 1):
-
-    eval_frame = inv(frame) if find_void else frame
-
-    # Identify the regions of connectivity 2
-    labeled_frame, num_labels = label(eval_frame, connectivity=2, return_num=True)
-    if num_labels == 0:
-        return frame.shape[0] * frame.shape[1]
-
-    # Determines the region properties of the labeled frame
-    regions = regionprops(labeled_frame)
+def label_components(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Label the connected components of a boolean frame.
 
-    if not regions:
-        return frame.shape[0] * frame.shape[1]
+    Returns the label image and the area of each label (index 0 is background).
+    """
+    labeled_frame, num_labels = ndimage.label(frame, structure=CONNECTIVITY_STRUCTURE)
+    areas = np.bincount(labeled_frame.ravel(), minlength=num_labels + 1)
+    areas[0] = 0
+    return labeled_frame, areas
+
+
+def largest_areas(areas: np.ndarray, num: int = 1) -> List[int]:
+    """Return the `num` largest component areas, padded with 0."""
+    largest = np.sort(areas)[::-1][:num].tolist()
+    return largest + [0] * (num - len(largest))
+
+
+def component_centroid(labeled_frame: np.ndarray, region: int) -> Tuple[float, float]:
+    """Centroid (row, col) of one labeled region from its first-order moments."""
+    rows, cols = np.indices(labeled_frame.shape, sparse=True)
+    mask = labeled_frame == region
+    area = np.count_nonzero(mask)
+    return (
+        float(np.sum(mask * rows) / area),
+        float(np.sum(mask * cols) / area),
+    )
 
-    regions_sorted = sorted(regions, key=lambda r: r.area, reverse=True)
-    largest_regions = regions_sorted[:num]
-    areas = [region.area for region in largest_regions]
-    if num != len(areas):
-        areas.append(0)
-    return areas  # Returns largest region(s) area
 
+def label_stack_components(
+    stack: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Label the connected components of every frame of a boolean (K, H, W) stack.
 
-def largest_island_position(frame: np.ndarray):
+    Components never connect across frames, and labels are numbered frame by
+    frame, so frame k owns labels bounds[k - 1] + 1 to bounds[k]. Returns the
+    label stack, the area of each label and these per-frame bounds.
+    """
+    labeled_stack, num_labels = ndimage.label(stack, structure=plane_structure(2))
+    areas = np.bincount(labeled_stack.ravel(), minlength=num_labels + 1)
+    areas[0] = 0
+    bounds = np.maximum.accumulate(labeled_stack.reshape(len(stack), -1).max(axis=1))
+    return labeled_stack, areas, bounds
 
-    # Identify the regions of connectivity 2
-    labeled_frame, num_labels = label(frame, connectivity=2, return_num=True)
-    if num_labels == 0:
-        return None
 
-    # Determines the region properties of the labeled frame
-    regions = regionprops(labeled_frame)
+def check_span(labeled_frame: np.ndarray) -> bool:
+    """Check if any labeled region touches both top and bottom, or left and right."""
 
-    # Determines the region with the maximum area
-    largest_region = max(regions, key=lambda r: r.area)
+    def shares_label(first: np.ndarray, last: np.ndarray) -> bool:
+        return np.intersect1d(first[first > 0], last[last > 0]).size > 0
 
-    return largest_region.centroid  # Returns largest region centroid
+    return shares_label(labeled_frame[0, :], labeled_frame[-1, :]) or shares_label(
+        labeled_frame[:, 0], labeled_frame[:, -1]
+    )
 
 
 def write_binarization_data(csvwriter, frame_data: np.ndarray, frame_idx: int):
@@ -103,28 +106,72 @@ def write_binarization_data(csvwriter, frame_data: np.ndarray, frame_idx: int):
     csvwriter.writerow([])
 
 def analyze_binarized_frame(frame: np.ndarray) -> FrameMetrics:
-    """Analyze a single binarized frame and return metrics."""
-    # Calculate all metrics for this frame
-    island_area = find_largest_void(frame, find_void=False)[0]
-    island_area_2nd = find_largest_void(frame, find_void=False, num=2)[1]
-    island_position = largest_island_position(frame)
-    is_connected = check_span(frame)
-    void_area = find_largest_void(frame, find_void=True)[0]
-
-    # Get region data
-    labeled_frame, num_labels = label(frame, connectivity=2, return_num=True)
-    regions = regionprops(labeled_frame)
+    """
+    Analyze a single binarized frame and return metrics.
+
+    Islands and voids are each labeled once; areas, the largest island
+    centroid and spanning are all derived from those two label images.
+    """
+    frame = frame.astype(bool, copy=False)
+
+    island_labels, island_areas = label_components(frame)
+    island_area, island_area_2nd = largest_areas(island_areas, num=2)
+    island_position = None
+    if island_area > 0:
+        island_position = component_centroid(
+            island_labels, int(np.argmax(island_areas))
+        )
+
+    _, void_areas = label_components(~frame)
+    (void_area,) = largest_areas(void_areas)
 
     return FrameMetrics(
         island_area=island_area,
         island_area_2nd=island_area_2nd,
         island_position=island_position,
-        is_connected=is_connected,
+        is_connected=check_span(island_labels),
         void_area=void_area,
-        regions=regions,
     )
 
 
+def analyze_binarized_stack(stack: np.ndarray) -> List[FrameMetrics]:
+    """
+    Analyze a (K, H, W) stack of binarized frames, one FrameMetrics per frame.
+
+    Gives the same metrics as analyze_binarized_frame on each frame, but the
+    islands and voids of the whole stack are each labeled in a single call.
+    """
+    stack = stack.astype(bool, copy=False)
+
+    island_labels, island_areas, island_bounds = label_stack_components(stack)
+    _, void_areas, void_bounds = label_stack_components(~stack)
+
+    metrics = []
+    island_start, void_start = 1, 1
+    for k in range(len(stack)):
+        frame_island_areas = island_areas[island_start : island_bounds[k] + 1]
+        island_area, island_area_2nd = largest_areas(frame_island_areas, num=2)
+        island_position = None
+        if island_area > 0:
+            largest_label = island_start + int(np.argmax(frame_island_areas))
+            island_position = component_centroid(island_labels[k], largest_label)
+
+        (void_area,) = largest_areas(void_areas[void_start : void_bounds[k] + 1])
+
+        metrics.append(
+            FrameMetrics(
+                island_area=island_area,
+                island_area_2nd=island_area_2nd,
+                island_position=island_position,
+                is_connected=check_span(island_labels[k]),
+                void_area=void_area,
+            )
+        )
+        island_start, void_start = island_bounds[k] + 1, void_bounds[k] + 1
+
+    return metrics
+
+
 def calculate_frame_indices(num_frames: int, step: int) -> List[int]:
     """Calculate frame indices to process (matching original logic)."""
     frame_indices = list(range(0, num_frames, step))
@@ -137,6 +184,13 @@ def calculate_frame_indices(num_frames: int, step: int) -> List[int]:
     return frame_indices
 
 
+def calculate_binarization_frames(
+    num_frames: int, bin_config: BinarizationConfig
+) -> List[int]:
+    """Frames decoded by the binarization module for a video of num_frames."""
+    return calculate_frame_indices(num_frames, bin_config.frame_step)
+
+
 def calculate_visualization_frames(num_frames: int, step: int) -> set:
     """Calculate which frames should have visualizations saved (matching original logic)."""
     if num_frames <= 0:
@@ -150,6 +204,163 @@ def calculate_visualization_frames(num_frames: int, step: int) -> set:
     return {0, mid_point, num_frames}
 
 
+class VoidTracker:
+    """
+    Track void and island metrics frame by frame.
+
+    Frames listed in `frames` are pushed in ascending order with `consume`;
+    the per-frame metrics accumulate in the tracker's lists. Frames are
+    binarized in blocks of `batch_size`, on a pool of `threads` worker
+    threads if more than one is configured. Metrics and intermediates are
+    always recorded in frame order, and `flush` must be called once the last
+    frame is pushed.
+    """
+
+    def __init__(
+        self,
+        num_frames: int,
+        name: str,
+        bin_config: BinarizationConfig,
+        out_config: OutputConfig,
+        csvwriter=None,
+    ):
+        self.name = name
+        self.bin_config = bin_config
+        self.csvwriter = csvwriter
+
+        # Calculate which frames to process and visualize
+        self.frames = calculate_binarization_frames(num_frames, bin_config)
+        self.save_frames = set()
+        if out_config.save_graphs:
+            self.save_frames = calculate_visualization_frames(
+                num_frames, bin_config.frame_step
+            )
+
+        # Initialize result lists
+        self.void_lst = []
+        self.island_area_lst = []
+        self.island_area_lst2 = []
+        self.connected_lst = []
+
+        # Frames waiting to fill a block, and blocks submitted to the pool
+        self._block = []
+        self._pending = deque()
+        self._executor = None
+        if bin_config.threads > 1:
+            self._executor = ThreadPoolExecutor(max_workers=bin_config.threads)
+
+        # Binarization output buffers, reused across frames by each thread
+        self._buffers = threading.local()
+
+    def consume(self, frame_idx: int, frame: np.ndarray) -> None:
+        """Queue a frame for binarization and record any finished frames."""
+        self._block.append((frame_idx, frame))
+        if len(self._block) >= self.bin_config.batch_size:
+            self._submit_block()
+
+    def flush(self) -> None:
+        """Binarize the queued frames and record all outstanding metrics."""
+        try:
+            if self._block:
+                self._submit_block()
+            while self._pending:
+                self._record_block(*self._pending.popleft())
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Release the thread pool, dropping any frames still queued."""
+        self._block = []
+        self._pending.clear()
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _submit_block(self) -> None:
+        """Binarize the queued block, on the thread pool if there is one."""
+        frame_indices, frames = zip(*self._block)
+        self._block = []
+
+        if self._executor is None:
+            self._record_block(frame_indices, frames, self._binarize_block(frames))
+            return
+
+        future = self._executor.submit(self._binarize_block, frames)
+        self._pending.append((frame_indices, frames, future))
+
+        # Keep every thread busy while bounding the frames held in memory
+        while len(self._pending) > 2 * self.bin_config.threads:
+            self._record_block(*self._pending.popleft())
+
+    def _binarize_block(
+        self, frames: Sequence[np.ndarray]
+    ) -> Tuple[Sequence[np.ndarray], List[FrameMetrics]]:
+        """Binarize, filter and analyze a block of frames."""
+        threshold = self.bin_config.threshold_offset
+        area_size = int(self.bin_config.area_size)
+        binning_factor = self.bin_config.binning_number
+
+        if self.bin_config.batch_size > 1:
+            # Bin, binarize and filter the whole block at once
+            downsampled_stack = group_avg_stack(np.stack(frames), binning_factor)
+            binarized_stack = binarize_stack(downsampled_stack, threshold)
+            filtered_stack = remove_small_objects_stack(binarized_stack, area_size)
+            return filtered_stack, analyze_binarized_stack(binarized_stack)
+
+        filtered_frames, frame_metrics = [], []
+        for frame in frames:
+            # Binarize and downsample frame
+            downsampled_frame = group_avg(frame, binning_factor)
+            out = getattr(self._buffers, "binarized", None)
+            if out is None or out.shape != downsampled_frame.shape:
+                out = self._buffers.binarized = np.empty(
+                    downsampled_frame.shape, dtype=bool
+                )
+            binarized_frame = binarize(downsampled_frame, threshold, out=out)
+            filtered_frames.append(
+                morphology.remove_small_objects(binarized_frame, min_size=area_size)
+            )
+
+            # Analyze frame metrics
+            frame_metrics.append(analyze_binarized_frame(binarized_frame))
+
+        return filtered_frames, frame_metrics
+
+    def _record_block(
+        self,
+        frame_indices: Sequence[int],
+        frames: Sequence[np.ndarray],
+        binarized: Union[Future, Tuple[Sequence[np.ndarray], List[FrameMetrics]]],
+    ) -> None:
+        """Write intermediates for a binarized block and collect its metrics."""
+        if isinstance(binarized, Future):
+            binarized = binarized.result()
+        filtered_frames, frame_metrics = binarized
+
+        for frame_idx, frame, filtered_frame, metrics in zip(
+            frame_indices, frames, filtered_frames, frame_metrics
+        ):
+            # Write CSV data if enabled
+            if self.csvwriter:
+                write_binarization_data(
+                    self.csvwriter, filtered_frame.astype(int), frame_idx
+                )
+
+            # Save visualization if this is a key frame
+            if frame_idx in self.save_frames:
+                from visualization import save_binarization_visualization
+
+                save_binarization_visualization(
+                    frame, filtered_frame, frame_idx, self.name
+                )
+
+            # Collect metrics
+            self.void_lst.append(metrics.void_area)
+            self.island_area_lst.append(metrics.island_area)
+            self.island_area_lst2.append(metrics.island_area_2nd)
+            self.connected_lst.append(metrics.is_connected)
+
+
 def track_void(
     image: np.ndarray,
     name: str,
@@ -163,54 +374,162 @@ def track_void(
     Returns:
         Tuple of (void_sizes, island_areas, island_areas_2nd, connectivity_flags)
     """
-    num_frames = len(image)
-    threshold = bin_config.threshold_offset
-    area_size=bin_config.area_size
-    step = bin_config.frame_step
-    binning_factor = bin_config.binning_number
-    # Calculate which frames to process and visualize
-    frame_indices = calculate_frame_indices(num_frames, step)
-    save_frames = set()
-    if out_config.save_graphs:
-        save_frames = calculate_visualization_frames(num_frames, step)
-
-    # Initialize result lists
-    void_lst = []
-    island_area_lst = []
-    island_area_lst2 = []
-    connected_lst = []
-    region_lst = []
-
-#########added binning factor
-    # Process each frame
-    for frame_idx in frame_indices:
-        # Binarize and downsample frame       
-        downsampled_frame = group_avg(image[frame_idx], binning_factor)
-        binarized_frame = binarize(downsampled_frame, threshold) 
-        filtered_frame=morphology.remove_small_objects(binarized_frame>0, min_size=int(area_size))
-        # Analyze frame metrics
-        
-        metrics = analyze_binarized_frame(binarized_frame>0)
-        # Write CSV data if enabled
-        if csvwriter:
-            write_binarization_data(csvwriter, filtered_frame.astype(int), frame_idx)
-          
-        # Save visualization if this is a key frame
-        if frame_idx in save_frames:
-            from visualization import save_binarization_visualization
-
-            save_binarization_visualization(
-                image[frame_idx], filtered_frame, frame_idx, name
+    tracker = VoidTracker(len(image), name, bin_config, out_config, csvwriter)
+    for frame_idx in tracker.frames:
+        tracker.consume(frame_idx, image[frame_idx])
+    tracker.flush()
+
+    return (
+        tracker.void_lst,
+        tracker.island_area_lst,
+        tracker.island_area_lst2,
+        tracker.connected_lst,
+    )
+
+
+class BinarizationAnalyzer:
+    """
+    Streaming binarization analysis for one channel.
+
+    Frames are pushed with `consume` as they are decoded, and `finalize`
+    reduces the tracked metrics into BinarizationResults.
+    """
+
+    def __init__(
+        self,
+        num_frames: int,
+        name: str,
+        bin_config: BinarizationConfig,
+        out_config: OutputConfig,
+    ):
+        vprint("Beginning Binarization Analysis...")
+
+        self.num_frames = num_frames
+        self.name = name
+        self.bin_config = bin_config
+        self.out_config = out_config
+        self.frame_shape = None
+        self.is_empty = True
+
+        # Setup CSV writer if needed
+        self.csvwriter, self.myfile = None, None
+        if out_config.save_intermediates:
+            filename = os.path.join(name, "BinarizationData.csv")
+            self.csvwriter, self.myfile = setup_csv_writer(filename)
+
+        self.tracker = VoidTracker(
+            num_frames, name, bin_config, out_config, self.csvwriter
+        )
+        self.frames = self.tracker.frames
+
+    def consume(self, frame_idx: int, frame: np.ndarray) -> None:
+        """Process the next frame of the stream."""
+        self.frame_shape = frame.shape
+        self.is_empty = self.is_empty and not frame.any()
+        self.tracker.consume(frame_idx, frame)
+
+    def close(self) -> None:
+        """Release the thread pool and CSV file, e.g. when the stream fails."""
+        try:
+            self.tracker.close()
+        finally:
+            if self.myfile:
+                self.myfile.close()
+
+    def finalize(self) -> Tuple[Optional[plt.Figure], BinarizationResults]:
+        """Reduce the tracked frame metrics into BinarizationResults."""
+        bin_config = self.bin_config
+        out_config = self.out_config
+        num_frames = self.num_frames
+        frame_initial_percent = 0.05
+
+        # Binarize any frames still queued, then clean up CSV file
+        try:
+            self.tracker.flush()
+        finally:
+            if self.myfile:
+                self.myfile.close()
+
+        if self.is_empty:
+            if self.myfile:
+                os.remove(self.myfile.name)
+            return None, BinarizationResults()
+
+        # Adjust frame step if too large for video
+        frame_step = bin_config.frame_step
+        while num_frames <= frame_step:
+            frame_step = int(frame_step / 5)
+
+        largest_void_lst = self.tracker.void_lst
+        island_area_lst = self.tracker.island_area_lst
+        island_area_lst2 = self.tracker.island_area_lst2
+        connected_lst = self.tracker.connected_lst
+
+        # Calculate analysis windows
+        start_index = int(
+            np.floor(num_frames * bin_config.frame_start_percent / frame_step)
+        )
+        stop_index = int(
+            np.ceil(len(largest_void_lst) * bin_config.frame_stop_percent)
+        )
+        start_initial_index = int(
+            np.ceil(num_frames * frame_initial_percent / frame_step)
+        )
+
+        # Calculate initial baseline metrics
+        void_size_initial = np.mean(largest_void_lst[0:start_initial_index])
+        void_percent_gain_list = np.array(largest_void_lst) / void_size_initial
+
+        island_size_initial = np.mean(island_area_lst[0:start_initial_index])
+        island_size_initial2 = np.mean(island_area_lst2[0:start_initial_index])
+        island_percent_gain_list = np.array(island_area_lst) / island_size_initial
+
+        # Create visualization plot using extracted function
+        fig = None
+        if out_config.save_graphs:
+            from visualization import save_binarization_plot
+
+            start_plot_index = 0  # Reset to 0 as in original
+            fig = save_binarization_plot(
+                void_percent_gain_list,
+                island_percent_gain_list,
+                num_frames,
+                frame_step,
+                start_plot_index,
+                stop_index,
             )
 
-        # Collect metrics
-        void_lst.append(metrics.void_area)
-        island_area_lst.append(metrics.island_area)
-        island_area_lst2.append(metrics.island_area_2nd)
-        connected_lst.append(metrics.is_connected)
-        region_lst.append(metrics.regions)
+        # Calculate final metrics
+        downsample = 2
+        img_dims = self.frame_shape[0] * self.frame_shape[1] / (downsample**2)
+
+        avg_void_percent_change = (
+            np.mean(largest_void_lst[0:stop_index]) / void_size_initial
+        )
+        max_void_size = top_ten_average(largest_void_lst) / img_dims
+
+        avg_island_percent_change = (
+            np.mean(island_area_lst[0:stop_index]) / island_size_initial
+        )
+        island_size_initial_norm = island_size_initial / img_dims
+        island_size_initial2_norm = island_size_initial2 / img_dims
+        max_island_size = top_ten_average(island_area_lst) / img_dims
+
+        spanning = len([con for con in connected_lst if con == 1]) / len(
+            connected_lst
+        )
+
+        results = BinarizationResults(
+            spanning=spanning,
+            max_island_size=max_island_size,
+            max_void_size=max_void_size,
+            avg_island_percent_change=avg_island_percent_change,
+            avg_void_percent_change=avg_void_percent_change,
+            island_size_initial=island_size_initial_norm,
+            island_size_initial2=island_size_initial2_norm,
+        )
 
-    return void_lst, island_area_lst, island_area_lst2, connected_lst
+        return fig, results
 
 
 def analyze_binarization(
@@ -226,92 +545,10 @@ def analyze_binarization(
     Returns:
         Tuple of (matplotlib figure or None, BinarizationResults)
     """
-    vprint("Beginning Binarization Analysis...")
-
-    image = file[:, :, :, channel]
-    frame_initial_percent = 0.05
-
-    if (image == 0).all():
-        return None, BinarizationResults()
-
-    # Adjust frame step if too large for video
-    frame_step = bin_config.frame_step
-    while len(image) <= frame_step:
-        frame_step = int(frame_step / 5)
-
-    # Setup CSV writer if needed
-    csvwriter, myfile = None, None
-    if out_config.save_intermediates:
-        filename = os.path.join(name, "BinarizationData.csv")
-        csvwriter, myfile = setup_csv_writer(filename)
-
-    # Process frames using modular track_void function
-    largest_void_lst, island_area_lst, island_area_lst2, connected_lst = track_void(
-        image, name, bin_config, out_config, csvwriter
-    )
-
-    # Clean up CSV file
-    if myfile:
-        myfile.close()
+    image = get_channel(file, channel)
 
-    # Calculate analysis windows
-    start_index = int(
-        np.floor(len(image) * bin_config.frame_start_percent / frame_step)
-    )
-    stop_index = int(
-        np.ceil(len(largest_void_lst) * bin_config.frame_stop_percent)
-    )
-    start_initial_index = int(np.ceil(len(image) * frame_initial_percent / frame_step))
-
-    # Calculate initial baseline metrics
-    void_size_initial = np.mean(largest_void_lst[0:start_initial_index])
-    void_percent_gain_list = np.array(largest_void_lst) / void_size_initial
-
-    island_size_initial = np.mean(island_area_lst[0:start_initial_index])
-    island_size_initial2 = np.mean(island_area_lst2[0:start_initial_index])
-    island_percent_gain_list = np.array(island_area_lst) / island_size_initial
-
-    # Create visualization plot using extracted function
-    fig = None
-    if out_config.save_graphs:
-        from visualization import save_binarization_plot
-
-        start_plot_index = 0  # Reset to 0 as in original
-        fig = save_binarization_plot(
-            void_percent_gain_list,
-            island_percent_gain_list,
-            len(image),
-            frame_step,
-            start_plot_index,
-            stop_index,
-        )
-
-    # Calculate final metrics
-    downsample = 2
-    img_dims = image[0].shape[0] * image[0].shape[1] / (downsample**2)
-
-    avg_void_percent_change = (
-        np.mean(largest_void_lst[0:stop_index]) / void_size_initial
-    )
-    max_void_size = top_ten_average(largest_void_lst) / img_dims
-
-    avg_island_percent_change = (
-        np.mean(island_area_lst[0:stop_index]) / island_size_initial
-    )
-    island_size_initial_norm = island_size_initial / img_dims
-    island_size_initial2_norm = island_size_initial2 / img_dims
-    max_island_size = top_ten_average(island_area_lst) / img_dims
-
-    spanning = len([con for con in connected_lst if con == 1]) / len(connected_lst)
-
-    results = BinarizationResults(
-        spanning=spanning,
-        max_island_size=max_island_size,
-        max_void_size=max_void_size,
-        avg_island_percent_change=avg_island_percent_change,
-        avg_void_percent_change=avg_void_percent_change,
-        island_size_initial=island_size_initial_norm,
-        island_size_initial2=island_size_initial2_norm,
-    )
+    analyzer = BinarizationAnalyzer(len(image), name, bin_config, out_config)
+    for frame_idx in analyzer.frames:
+        analyzer.consume(frame_idx, image[frame_idx])
 
-    return fig, results
+    return analyzer.finalize()
@@ -1,16 +1,34 @@
 import os
-from typing import List, Tuple, TypeAlias
+import threading
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeAlias
 
 import numpy as np
+from scipy import fft
 
 from core import OpticalFlowConfig, OutputConfig, FlowResults
 from utils import vprint
 from utils.analysis import group_avg
+from utils.reader import get_channel
 from utils.setup import setup_csv_writer
 
 FramePair: TypeAlias = Tuple[int, int]
 FlowOutput: TypeAlias = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
-FlowStats: TypeAlias = Tuple[float, float, float]
+FlowStats: TypeAlias = Tuple[float, float, float, float]
+FlowEngine: TypeAlias = Callable[..., np.ndarray]
+
+# Interrogation windows correlated at once by the PIV engine, bounds memory
+PIV_CHUNK_WINDOWS = 512
+
+# Normalized median test of PIV vectors: largest residual kept, and the
+# noise level in pixels that keeps near-uniform flow from failing it
+PIV_OUTLIER_THRESHOLD = 2.0
+PIV_NOISE_PX = 0.1
+
+# Per-pair statistics in pixel/frame units, saved next to each channel's output
+FLOW_STATS_FILE = "FlowStats.npz"
 
 
 def calculate_frame_pairs(num_frames: int, frame_step: int) -> List[FramePair]:
@@ -35,6 +53,12 @@ def calculate_frame_pairs(num_frames: int, frame_step: int) -> List[FramePair]:
     return frame_pairs
 
 
+def calculate_flow_frames(num_frames: int, opt_config: OpticalFlowConfig) -> List[int]:
+    """Frames decoded by the optical flow module for a video of num_frames."""
+    frame_pairs = calculate_frame_pairs(num_frames, opt_config.frame_step)
+    return sorted({frame for frame_pair in frame_pairs for frame in frame_pair})
+
+
 def calculate_visualization_frames(
     frame_pairs: List[FramePair], frame_step: int
 ) -> set:
@@ -52,14 +76,274 @@ def calculate_visualization_frames(
     return {0, mid_point, end_point}
 
 
+def flow_binning(opt_config: OpticalFlowConfig) -> int:
+    """Binning applied to frames before flow, 1 unless bin_frames is enabled."""
+    if opt_config.bin_frames:
+        return max(1, opt_config.binning_number)
+    return 1
+
+
+def prepare_flow_frame(frame: np.ndarray, binning: int = 1) -> np.ndarray:
+    """
+    Convert a frame to the contiguous float32 image Farneback works on.
+
+    Optionally bins it by averaging over binning x binning blocks. Frames are
+    prepared once when decoded, so frames shared by adjacent pairs are not
+    converted again for every pair.
+    """
+    if binning > 1:
+        frame = group_avg(frame, binning)
+    return np.ascontiguousarray(frame, dtype=np.float32)
+
+
+def farneback_flow(
+    prev_frame: np.ndarray,
+    next_frame: np.ndarray,
+    window_size: int,
+    downsample_factor: int,
+    flow: Optional[np.ndarray] = None,
+    warm_start: bool = False,
+) -> np.ndarray:
+    """
+    Dense Farneback flow, averaged onto the downsampled grid.
+
+    `flow` is an optional (H, W, 2) float32 buffer the dense field is written
+    into, so it can be reused across pairs. With warm_start it must hold the
+    previous pair's field, which is taken as the initial estimate and refined
+    with a single pyramid level and fewer iterations.
+    """
+    import cv2 as cv
+
+    if warm_start:
+        levels, iterations, flags = 1, 2, cv.OPTFLOW_USE_INITIAL_FLOW
+    else:
+        levels, iterations, flags = 3, 3, 0
+    params = (0.5, levels, window_size, iterations, 5, 1.2, flags)
+    flow = cv.calcOpticalFlowFarneback(prev_frame, next_frame, flow, *params)
+    return group_avg(flow, downsample_factor)
+
+
+def dis_flow(
+    prev_frame: np.ndarray,
+    next_frame: np.ndarray,
+    window_size: int,
+    downsample_factor: int,
+    flow: Optional[np.ndarray] = None,
+    warm_start: bool = False,
+) -> np.ndarray:
+    """
+    Dense DIS (dense inverse search) flow, averaged onto the downsampled grid.
+
+    DIS works on 8-bit images, so both frames are scaled to 0-255 with a
+    shared range to keep their relative brightness. The preset picks its own
+    patch sizes, so window_size is not used. The flow buffer and warm start
+    are Farneback only and ignored here.
+    """
+    import cv2 as cv
+
+    low = min(prev_frame.min(), next_frame.min())
+    high = max(prev_frame.max(), next_frame.max())
+    scale = 255 / (high - low) if high > low else 0
+
+    def to_uint8(frame: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((frame - low) * scale), 0, 255).astype(np.uint8)
+
+    dis = cv.DISOpticalFlow_create(cv.DISOPTICAL_FLOW_PRESET_MEDIUM)
+    flow = dis.calc(to_uint8(prev_frame), to_uint8(next_frame), None)
+    return group_avg(flow, downsample_factor)
+
+
+def piv_flow(
+    prev_frame: np.ndarray,
+    next_frame: np.ndarray,
+    window_size: int,
+    downsample_factor: int,
+    flow: Optional[np.ndarray] = None,
+    warm_start: bool = False,
+) -> np.ndarray:
+    """
+    FFT cross-correlation PIV, computed directly on the downsampled grid.
+
+    Each grid cell gets the displacement of the window_size x window_size
+    interrogation window centred on it. The window is matched against every
+    equally sized window of the next frame up to half a window away, with the
+    zero-normalized cross-correlation of the two, and the best match is
+    refined to subpixel precision with a parabolic fit. Only windows that lie
+    fully inside both frames are compared, so cells near the border, cells
+    whose best match is at the edge of the search, and vectors rejected by
+    piv_outliers are NaN. Windows without texture get zero flow. The flow
+    buffer and warm start are Farneback only and ignored here.
+    """
+    size = max(2, window_size)
+    reach = size // 2
+    span = 2 * reach + 1
+    region = size + 2 * reach
+    step = downsample_factor
+    rows, cols = prev_frame.shape[0] // step, prev_frame.shape[1] // step
+    flow = np.full((rows, cols, 2), np.nan, dtype=np.float32)
+
+    # Top-left corner of each cell's window, and the cells whose search
+    # region of every shift of the window lies inside the frame
+    def full_cells(num_cells: int, length: int) -> Tuple[int, int]:
+        corners = step // 2 + np.arange(num_cells) * step - size // 2
+        inside = np.flatnonzero((corners >= reach) & (corners + size + reach <= length))
+        if len(inside) == 0:
+            return 0, 0
+        return inside[0], inside[-1] + 1
+
+    row_start, row_stop = full_cells(rows, prev_frame.shape[0])
+    col_start, col_stop = full_cells(cols, prev_frame.shape[1])
+    if row_start == row_stop or col_start == col_stop:
+        return flow
+
+    def cell_views(frame: np.ndarray, width: int, offset: int) -> np.ndarray:
+        view = np.lib.stride_tricks.sliding_window_view(frame, (width, width))
+        y = step // 2 + row_start * step - size // 2 - offset
+        x = step // 2 + col_start * step - size // 2 - offset
+        return view[y::step, x::step][: row_stop - row_start, : col_stop - col_start]
+
+    # Sum of squared deviations from the mean of every window of next_frame,
+    # from integral images, for the normalization at each cell and shift
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        table = np.zeros((values.shape[0] + 1, values.shape[1] + 1))
+        table[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+        return (
+            table[size:, size:]
+            - table[:-size, size:]
+            - table[size:, :-size]
+            + table[:-size, :-size]
+        )
+
+    centred = next_frame.astype(np.float64)
+    centred -= centred.mean()
+    sums = window_sums(centred)
+    next_energy = window_sums(centred * centred) - sums * sums / (size * size)
+
+    prev_windows = cell_views(prev_frame, size, 0)
+    next_regions = cell_views(next_frame, region, reach)
+    next_energies = cell_views(next_energy, span, reach)
+    fft_shape = (fft.next_fast_len(region, real=True),) * 2
+    chunk_rows = max(1, PIV_CHUNK_WINDOWS // max(1, col_stop - col_start))
+
+    for start in range(0, row_stop - row_start, chunk_rows):
+        a = prev_windows[start : start + chunk_rows].astype(np.float32)
+        b = next_regions[start : start + chunk_rows].astype(np.float32)
+        a -= a.mean(axis=(-2, -1), keepdims=True)
+        b -= b.mean(axis=(-2, -1), keepdims=True)
+        a_energy = np.einsum("...ij,...ij->...", a, a, dtype=np.float64)
+
+        # corr[dy, dx] = sum(a(y, x) * b(y + dy, x + dx)), zero shift at reach
+        spectrum = np.conj(fft.rfft2(a, s=fft_shape)) * fft.rfft2(b, s=fft_shape)
+        corr = fft.irfft2(spectrum, s=fft_shape)[..., :span, :span]
+
+        b_energy = np.maximum(next_energies[start : start + chunk_rows], 0)
+        denom = np.sqrt(a_energy[..., None, None] * b_energy)
+        ncc = np.divide(corr, denom, out=np.zeros_like(denom), where=denom > 0)
+
+        flat = ncc.reshape(*ncc.shape[:2], -1)
+        peak_y, peak_x = np.divmod(np.argmax(flat, axis=-1), span)
+
+        def at(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+            idx = np.clip(y, 0, span - 1) * span + np.clip(x, 0, span - 1)
+            return np.take_along_axis(flat, idx[..., None], axis=-1)[..., 0]
+
+        def subpixel(
+            minus: np.ndarray, centre: np.ndarray, plus: np.ndarray
+        ) -> np.ndarray:
+            denom = minus - 2 * centre + plus
+            return np.divide(
+                minus - plus, 2 * denom, out=np.zeros_like(denom), where=denom < 0
+            )
+
+        centre = at(peak_y, peak_x)
+        dy = peak_y - reach + subpixel(
+            at(peak_y - 1, peak_x), centre, at(peak_y + 1, peak_x)
+        )
+        dx = peak_x - reach + subpixel(
+            at(peak_y, peak_x - 1), centre, at(peak_y, peak_x + 1)
+        )
+
+        # A best match at the edge of the search may lie beyond it
+        found = (peak_y > 0) & (peak_y < span - 1) & (peak_x > 0) & (peak_x < span - 1)
+        textured = a_energy > 0
+        cells = flow[row_start + start : row_start + start + len(a), col_start:col_stop]
+        cells[..., 0] = np.where(textured, np.where(found, dx, np.nan), 0)
+        cells[..., 1] = np.where(textured, np.where(found, dy, np.nan), 0)
+
+    flow[piv_outliers(flow)] = np.nan
+    return flow
+
+
+def piv_outliers(flow: np.ndarray) -> np.ndarray:
+    """
+    Cells whose vector fails the normalized median test of its neighbours.
+
+    A vector is an outlier when either component differs from the median of
+    its (up to 8) neighbours by more than PIV_OUTLIER_THRESHOLD times their
+    median deviation from that median, plus PIV_NOISE_PX for the noise of
+    near-uniform flow (Westerweel & Scarano, 2005). NaN cells are ignored.
+    """
+    rows, cols, _ = flow.shape
+    padded = np.pad(flow, ((1, 1), (1, 1), (0, 0)), constant_values=np.nan)
+    neighbours = np.stack(
+        [
+            padded[1 + dy : 1 + dy + rows, 1 + dx : 1 + dx + cols]
+            for dy in (-1, 0, 1)
+            for dx in (-1, 0, 1)
+            if dy or dx
+        ]
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Cells without neighbours
+        median = np.nanmedian(neighbours, axis=0)
+        spread = np.nanmedian(np.abs(neighbours - median), axis=0)
+    residual = np.abs(flow - median) / (spread + PIV_NOISE_PX)
+    return np.any(residual > PIV_OUTLIER_THRESHOLD, axis=-1)
+
+
+# Optical flow engines selectable with OpticalFlowConfig.engine. Each takes
+# (prev_frame, next_frame, window_size, downsample_factor, flow, warm_start)
+FLOW_ENGINES: Dict[str, FlowEngine] = {
+    "farneback": farneback_flow,
+    "dis": dis_flow,
+    "piv": piv_flow,
+}
+
+
+def get_flow_engine(opt_config: OpticalFlowConfig) -> FlowEngine:
+    """Look up the flow engine selected in the config."""
+    try:
+        return FLOW_ENGINES[opt_config.engine]
+    except KeyError:
+        raise ValueError(
+            f"Unknown optical flow engine: {opt_config.engine} "
+            f"(expected one of {', '.join(FLOW_ENGINES)})"
+        )
+
+
+def measured(values: np.ndarray) -> np.ndarray:
+    """Values of the cells that have a flow vector, as PIV leaves others NaN."""
+    missing = np.isnan(values)
+    return values[~missing] if missing.any() else values
+
+
 def calculate_optical_flow(
     images: np.ndarray,
     frame_pair: FramePair,
     opt_config: OpticalFlowConfig,
+    flow_buffer: Optional[np.ndarray] = None,
+    warm_start: bool = False,
 ) -> Tuple[FlowOutput, FlowStats]:
-    """Calculate optical flow between two frames."""
-    import cv2 as cv
-
+    """
+    Calculate optical flow between two frames.
+
+    `images` is indexed by frame number and holds frames from
+    prepare_flow_frame, binned by flow_binning(opt_config). On binned frames
+    the window is scaled down to cover the same area, and the flow is scaled
+    back up so fields and speeds stay in full-resolution pixels.
+    `flow_buffer` and `warm_start` are passed to the engine, see
+    farneback_flow.
+    """
     start_frame, end_frame = frame_pair
 
     frame_int = opt_config.frame_interval_s
@@ -70,23 +354,38 @@ def calculate_optical_flow(
         frame_int * (end_frame - start_frame)
     )
 
-    params = (None, 0.5, 3, opt_config.window_size, 3, 5, 1.2, 0)
-    flow = cv.calcOpticalFlowFarneback(images[start_frame], images[end_frame], *params)
+    binning = flow_binning(opt_config)
+    window_size = max(1, round(opt_config.window_size / binning))
+    downsample_factor = max(1, opt_config.downsample_factor // binning)
+
+    engine = get_flow_engine(opt_config)
+    prev_frame = prepare_flow_frame(images[start_frame])
+    next_frame = prepare_flow_frame(images[end_frame])
+    flow_reduced = engine(
+        prev_frame,
+        next_frame,
+        window_size,
+        downsample_factor,
+        flow=flow_buffer,
+        warm_start=warm_start,
+    )
+    if binning > 1:
+        flow_reduced *= binning  # Binned pixels to full-resolution pixels
 
-    flow_reduced = group_avg(flow, opt_config.downsample_factor)
     downU = np.flipud(flow_reduced[:, :, 0])
     downV = np.flipud(flow_reduced[:, :, 1])
 
     directions = np.arctan2(downV, downU)
     speed = np.sqrt(downU**2 + downV**2)
+    pixel_speed = np.mean(measured(speed)) / (end_frame - start_frame)  # pixels/frame
     speed *= speed_conversion_factor  # Convert speed to nm/sec
 
-    theta = np.mean(directions)
-    sigma_theta = np.std(directions)
-    mean_speed = np.mean(speed)
+    theta = np.mean(measured(directions))
+    sigma_theta = np.std(measured(directions))
+    mean_speed = np.mean(measured(speed))
 
     flow: FlowOutput = (downU, downV, directions, speed)
-    flow_stats: FlowStats = (theta, sigma_theta, mean_speed)
+    flow_stats: FlowStats = (theta, sigma_theta, mean_speed, pixel_speed)
 
     return flow, flow_stats
 
@@ -114,6 +413,64 @@ def aggregate_flow_stats(
     return FlowResults(mean_speed, delta_speed, mean_theta, mean_sigma_theta)
 
 
+def save_flow_stats(
+    filepath: str,
+    frame_pairs: List[FramePair],
+    pixel_speeds: List[float],
+    thetas: List[float],
+    sigma_thetas: List[float],
+    is_empty: bool = False,
+    opt_config: Optional[OpticalFlowConfig] = None,
+) -> None:
+    """
+    Save per-pair flow statistics in pixel/frame units.
+
+    Speeds only depend on nm_pixel_ratio and frame_interval_s through a
+    linear factor, so flow_results_from_stats can rebuild FlowResults in new
+    units from this file without recomputing flow. The units of opt_config, if
+    given, are saved too so a recompute can default to them.
+    """
+    units = {}
+    if opt_config is not None:
+        units = {
+            "nm_pixel_ratio": float(opt_config.nm_pixel_ratio),
+            "frame_interval_s": float(opt_config.frame_interval_s),
+        }
+    np.savez(
+        filepath,
+        spacing=np.array([end - start for start, end in frame_pairs], dtype=int),
+        pixel_speed=np.array(pixel_speeds, dtype=np.float32),
+        theta=np.array(thetas, dtype=np.float32),
+        sigma_theta=np.array(sigma_thetas, dtype=np.float32),
+        is_empty=is_empty,
+        **units,
+    )
+
+
+def load_flow_stats(filepath: str) -> Dict[str, np.ndarray]:
+    """Load per-pair flow statistics saved by save_flow_stats."""
+    with np.load(filepath) as stats:
+        return {key: stats[key] for key in stats.files}
+
+
+def flow_results_from_stats(
+    stats: Dict[str, np.ndarray], opt_config: OpticalFlowConfig
+) -> FlowResults:
+    """Aggregate saved per-pair statistics into FlowResults in the config's units."""
+    if stats["is_empty"] or len(stats["spacing"]) == 0:
+        return FlowResults()
+
+    frame_int = opt_config.frame_interval_s
+    if frame_int == 0:
+        frame_int = 1
+    # Convert from pixels/frame to nm/sec
+    speeds = stats["pixel_speed"] * np.float32(opt_config.nm_pixel_ratio / frame_int)
+
+    return aggregate_flow_stats(
+        list(stats["theta"]), list(stats["sigma_theta"]), list(speeds)
+    )
+
+
 def write_flow_data(csvwriter, flow: FlowOutput, frame_pair: Tuple[int, int]):
     """Write flow field data to CSV."""
     if not csvwriter:
@@ -129,61 +486,223 @@ def write_flow_data(csvwriter, flow: FlowOutput, frame_pair: Tuple[int, int]):
     csvwriter.writerows(downV)
 
 
-def analyze_flow(
-    file: np.ndarray,
-    name: str,
-    channel: int,
-    opt_config: OpticalFlowConfig,
-    out_config: OutputConfig,
-) -> FlowResults:
-    vprint("Beginning Flow Analysis...")
-
-    images = file[:, :, :, channel]
-    num_frames = len(images)
-
-    if (images == 0).all():
-        return FlowResults()
-
-    csvwriter, myfile = None, None
-    if out_config.save_intermediates:
-        filename = os.path.join(name, "OpticalFlow.csv")
-        csvwriter, myfile = setup_csv_writer(filename)
+class FlowAnalyzer:
+    """
+    Streaming optical flow analysis for one channel.
+
+    Frames are pushed in ascending order with `consume`. Each pair's flow is
+    computed as soon as both of its frames have arrived. Frames are prepared
+    for flow once on arrival and dropped once no remaining pair needs them,
+    so a frame shared by two pairs is only converted once. With more than one of
+    `threads`, pairs are computed concurrently on a thread pool, while the
+    statistics, CSV rows and visualizations are still recorded in pair order.
+
+    The dense flow field is written into one preallocated buffer per thread.
+    With `warm_start`, each pair starts from the previous pair's field. This
+    needs pairs computed one after the other, so it only applies when
+    `threads` is 1.
+
+    When the output directory exists, the per-pair statistics are also saved
+    there in pixel/frame units (FLOW_STATS_FILE), see flow_results_from_stats.
+    """
+
+    def __init__(
+        self,
+        num_frames: int,
+        name: str,
+        opt_config: OpticalFlowConfig,
+        out_config: OutputConfig,
+    ):
+        vprint("Beginning Flow Analysis...")
+
+        self.name = name
+        self.opt_config = opt_config
+        self.is_empty = True
+        get_flow_engine(opt_config)  # Fail early on an unknown engine
+
+        frame_step = opt_config.frame_step
+        self.frame_pairs = calculate_frame_pairs(num_frames, frame_step)
+        self.frames = sorted({frame for pair in self.frame_pairs for frame in pair})
+
+        # Determine which frames to save visualizations for
+        self.save_frames = set()
+        if out_config.save_graphs:
+            self.save_frames = calculate_visualization_frames(
+                self.frame_pairs, frame_step
+            )
 
-    thetas, sigma_thetas, speeds = [], [], []
-    frame_step = opt_config.frame_step
-    frame_pairs = calculate_frame_pairs(num_frames, frame_step)
+        self.csvwriter, self.myfile = None, None
+        if out_config.save_intermediates:
+            filename = os.path.join(name, "OpticalFlow.csv")
+            self.csvwriter, self.myfile = setup_csv_writer(filename)
+
+        self.thetas, self.sigma_thetas, self.speeds = [], [], []
+        self.pixel_speeds = []
+        self._pending = deque(self.frame_pairs)
+        self._images: Dict[int, np.ndarray] = {}
+        self._buffers = threading.local()
+        self._warm = False  # Whether the serial buffer holds the last pair's field
+
+        # Pairs submitted to the thread pool, recorded in submission order
+        self._in_flight = deque()
+        self._executor = None
+        self._cv_threads: Optional[int] = None
+        if opt_config.threads > 1:
+            self._executor = ThreadPoolExecutor(max_workers=opt_config.threads)
+            self._share_cv_threads(opt_config.threads)
+
+    def _share_cv_threads(self, threads: int) -> None:
+        """Split OpenCV's internal threads between the flow worker threads."""
+        import cv2 as cv
+
+        self._cv_threads = cv.getNumThreads()
+        cv.setNumThreads(max(1, (os.cpu_count() or 1) // threads))
+
+    def consume(self, frame_idx: int, frame: np.ndarray) -> None:
+        """Add the next frame and compute every pair it completes."""
+        self.is_empty = self.is_empty and not frame.any()
+        self._images[frame_idx] = prepare_flow_frame(
+            frame, flow_binning(self.opt_config)
+        )
 
-    # Determine which frames to save visualizations for
-    save_frames = set()
-    if out_config.save_graphs:
-        save_frames = calculate_visualization_frames(frame_pairs, frame_step)
+        while self._pending and all(f in self._images for f in self._pending[0]):
+            self._submit_pair(self._pending.popleft())
+
+        # Drop frames that no remaining pair needs
+        needed = {frame for pair in self._pending for frame in pair}
+        for idx in [idx for idx in self._images if idx not in needed]:
+            del self._images[idx]
+
+    def _flow_buffer(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """The calling thread's dense flow buffer for frames of this shape."""
+        buffer = getattr(self._buffers, "flow", None)
+        if buffer is None or buffer.shape[:2] != shape:
+            buffer = np.zeros((*shape, 2), dtype=np.float32)
+            self._buffers.flow = buffer
+        return buffer
+
+    def _pair_flow(
+        self,
+        images: Dict[int, np.ndarray],
+        frame_pair: FramePair,
+        warm_start: bool = False,
+    ) -> Tuple[FlowOutput, FlowStats]:
+        """Compute a pair's flow into the calling thread's flow buffer."""
+        buffer = self._flow_buffer(images[frame_pair[0]].shape)
+        return calculate_optical_flow(
+            images, frame_pair, self.opt_config, buffer, warm_start
+        )
 
-    for frame_pair in frame_pairs:
+    def _submit_pair(self, frame_pair: FramePair) -> None:
+        """Compute a pair's flow, on the thread pool if there is one."""
+        if self._executor is None:
+            warm_start = self._warm and self.opt_config.warm_start
+            flow_output = self._pair_flow(self._images, frame_pair, warm_start)
+            self._warm = True
+            self._record_pair(frame_pair, flow_output)
+            return
+
+        # Hand the worker its own frames, since _images changes as frames arrive
+        images = {frame: self._images[frame] for frame in frame_pair}
+        future = self._executor.submit(self._pair_flow, images, frame_pair)
+        self._in_flight.append((frame_pair, future))
+
+        # Keep every thread busy while bounding the flow fields held in memory
+        while len(self._in_flight) > 2 * self.opt_config.threads:
+            frame_pair, future = self._in_flight.popleft()
+            self._record_pair(frame_pair, future.result())
+
+    def _record_pair(
+        self, frame_pair: FramePair, flow_output: Tuple[FlowOutput, FlowStats]
+    ) -> None:
+        """Save a pair's flow field and collect its statistics."""
         start_frame, _ = frame_pair
-
-        flow, flow_stats = calculate_optical_flow(
-            images,
-            frame_pair,
-            opt_config,
-        )
+        flow, flow_stats = flow_output
 
         # Save visualization for key frames
-        if start_frame in save_frames:
+        if start_frame in self.save_frames:
             from visualization import save_flow_visualization
 
             save_flow_visualization(
-                flow, start_frame, name, opt_config.downsample_factor
+                flow, start_frame, self.name, self.opt_config.downsample_factor
+            )
+
+        if self.csvwriter:
+            write_flow_data(self.csvwriter, flow, frame_pair)
+
+        theta, sigma_theta, mean_speed, pixel_speed = flow_stats
+        self.thetas.append(theta)
+        self.sigma_thetas.append(sigma_theta)
+        self.speeds.append(mean_speed)
+        self.pixel_speeds.append(pixel_speed)
+
+    def _drain(self) -> None:
+        """Record all pairs still on the thread pool and release it."""
+        try:
+            while self._in_flight:
+                frame_pair, future = self._in_flight.popleft()
+                self._record_pair(frame_pair, future.result())
+        finally:
+            self._release_threads()
+
+    def _release_threads(self) -> None:
+        """Shut down the thread pool and restore OpenCV's thread count."""
+        self._in_flight.clear()
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self._cv_threads is not None:
+            import cv2 as cv
+
+            cv.setNumThreads(self._cv_threads)
+            self._cv_threads = None
+
+    def close(self) -> None:
+        """Release the thread pool and CSV file, e.g. when the stream fails."""
+        try:
+            self._release_threads()
+        finally:
+            if self.myfile:
+                self.myfile.close()
+
+    def finalize(self) -> FlowResults:
+        """Aggregate the per-pair statistics into FlowResults."""
+        try:
+            self._drain()
+        finally:
+            self.close()
+
+        # Keep the unit-free statistics next to the channel's other outputs
+        if os.path.isdir(self.name):
+            save_flow_stats(
+                os.path.join(self.name, FLOW_STATS_FILE),
+                self.frame_pairs,
+                self.pixel_speeds,
+                self.thetas,
+                self.sigma_thetas,
+                self.is_empty,
+                self.opt_config,
             )
 
-        if csvwriter:
-            write_flow_data(csvwriter, flow, frame_pair)
+        if self.is_empty:
+            if self.myfile:
+                os.remove(self.myfile.name)
+            return FlowResults()
+
+        return aggregate_flow_stats(self.thetas, self.sigma_thetas, self.speeds)
 
-        theta, sigma_theta, mean_speed = flow_stats
-        thetas.append(theta)
-        sigma_thetas.append(sigma_theta)
-        speeds.append(mean_speed)
 
-    if myfile:
-        myfile.close()
+def analyze_flow(
+    file: np.ndarray,
+    name: str,
+    channel: int,
+    opt_config: OpticalFlowConfig,
+    out_config: OutputConfig,
+) -> FlowResults:
+    images = get_channel(file, channel)
+
+    analyzer = FlowAnalyzer(len(images), name, opt_config, out_config)
+    for frame_idx in analyzer.frames:
+        analyzer.consume(frame_idx, images[frame_idx])
 
-    return aggregate_flow_stats(thetas, sigma_thetas, speeds)
+    return analyzer.finalize()
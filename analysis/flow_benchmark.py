@@ -0,0 +1,128 @@
+"""
+Benchmark the optical flow engines against each other.
+
+Every engine runs on the same frames of each video. The report lists the time
+each engine took and how far its flow metrics are from the reference engine
+(Farneback by default):
+
+    python -m analysis.flow_benchmark video1.tif video2.nd2 --channel 0
+"""
+
+import argparse
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analysis.flow import FLOW_ENGINES, FlowAnalyzer, calculate_flow_frames
+from core import FlowResults, OpticalFlowConfig, OutputConfig
+from utils.reader import get_channel, open_video
+
+
+def run_engine(
+    frames: Dict[int, np.ndarray], num_frames: int, opt_config: OpticalFlowConfig
+) -> Tuple[FlowResults, float]:
+    """Run flow analysis on preloaded frames, returning results and seconds taken."""
+    start_time = time.perf_counter()
+    analyzer = FlowAnalyzer(num_frames, "", opt_config, OutputConfig())
+    for frame_idx in analyzer.frames:
+        analyzer.consume(frame_idx, frames[frame_idx])
+    results = analyzer.finalize()
+    return results, time.perf_counter() - start_time
+
+
+def benchmark_file(
+    filepath: str,
+    channel: int,
+    opt_config: OpticalFlowConfig,
+    engines: List[str],
+) -> Dict[str, Tuple[FlowResults, float]]:
+    """Run each engine on one channel of a video."""
+    with open_video(filepath) as video:
+        image = get_channel(video, channel)
+        num_frames = len(image)
+        frames = {
+            frame_idx: np.asarray(image[frame_idx])
+            for frame_idx in calculate_flow_frames(num_frames, opt_config)
+        }
+
+    return {
+        engine: run_engine(frames, num_frames, replace(opt_config, engine=engine))
+        for engine in engines
+    }
+
+
+def format_report(
+    filepath: str,
+    timings: Dict[str, Tuple[FlowResults, float]],
+    reference: str,
+) -> List[str]:
+    """Format one file's results as table rows, compared against the reference."""
+    ref_results, ref_time = timings[reference]
+    lines = [
+        filepath,
+        f"  {'Engine':<10} {'Time (s)':>9} {'Speedup':>8} {'Mean Speed':>11} "
+        f"{'Speed Err':>10} {'Theta Err':>10} {'Spread Err':>11}",
+    ]
+    for engine, (results, elapsed) in timings.items():
+        speed_err = results.mean_speed / ref_results.mean_speed - 1
+        theta_err = np.angle(np.exp(1j * (results.mean_theta - ref_results.mean_theta)))
+        spread_err = results.mean_sigma_theta - ref_results.mean_sigma_theta
+        lines.append(
+            f"  {engine:<10} {elapsed:>9.2f} {ref_time / elapsed:>7.1f}x "
+            f"{results.mean_speed:>11.4g} {speed_err:>+9.1%} "
+            f"{theta_err:>+10.3f} {spread_err:>+11.3f}"
+        )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="+", help="TIFF or ND2 videos to benchmark")
+    parser.add_argument("--channel", type=int, default=0)
+    parser.add_argument(
+        "--engines", nargs="+", default=list(FLOW_ENGINES), choices=list(FLOW_ENGINES)
+    )
+    parser.add_argument(
+        "--reference", default="farneback", choices=list(FLOW_ENGINES)
+    )
+    parser.add_argument(
+        "--frame-step", type=int, default=OpticalFlowConfig.frame_step
+    )
+    parser.add_argument(
+        "--window-size", type=int, default=OpticalFlowConfig.window_size
+    )
+    parser.add_argument(
+        "--downsample", type=int, default=OpticalFlowConfig.downsample_factor
+    )
+    parser.add_argument(
+        "--binning",
+        type=int,
+        default=1,
+        help="bin frames before flow (sets bin_frames and binning_number)",
+    )
+    parser.add_argument(
+        "--warm-start",
+        action="store_true",
+        help="start each Farneback pair from the previous pair's flow",
+    )
+    args = parser.parse_args(argv)
+
+    engines = list(dict.fromkeys([args.reference] + args.engines))
+    opt_config = OpticalFlowConfig(
+        frame_step=args.frame_step,
+        window_size=args.window_size,
+        downsample_factor=args.downsample,
+        binning_number=max(1, args.binning),
+        bin_frames=args.binning > 1,
+        warm_start=args.warm_start,
+    )
+
+    for filepath in args.files:
+        timings = benchmark_file(filepath, args.channel, opt_config, engines)
+        print("\n".join(format_report(filepath, timings, args.reference)))
+
+
+if __name__ == "__main__":
+    main()
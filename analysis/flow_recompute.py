@@ -0,0 +1,131 @@
+"""
+Recompute flow speeds in new units without recomputing flow.
+
+Reads a summary CSV, rebuilds each channel's flow results from the per-pair
+statistics saved next to its outputs (FlowStats.npz) with the given pixel
+size and frame interval, and writes the summary CSV again:
+
+    python -m analysis.flow_recompute "data Summary.csv" --nm-pixel-ratio 65
+
+A unit that is not given keeps the value each channel was analyzed with.
+"""
+
+import argparse
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from analysis.flow import FLOW_STATS_FILE, flow_results_from_stats, load_flow_stats
+from core import ChannelResults, OpticalFlowConfig
+from utils.reader import read_csv_to_channel_results
+from utils.setup import remove_extension
+from utils.writer import gen_combined_barcode, results_to_csv
+
+
+def flow_stats_path(filepath: str, channel: int) -> str:
+    """Where the flow statistics of a video's channel are saved."""
+    output_dir = remove_extension(filepath) + " BARCODE Output"
+    return os.path.join(output_dir, f"Channel {channel}", FLOW_STATS_FILE)
+
+
+def stats_config(
+    stats: Dict[str, np.ndarray],
+    nm_pixel_ratio: Optional[float],
+    frame_interval_s: Optional[float],
+) -> OpticalFlowConfig:
+    """
+    Units to rebuild saved flow statistics in.
+
+    A unit that is None takes the value saved with the statistics, or the
+    OpticalFlowConfig default for statistics saved without units.
+    """
+    if nm_pixel_ratio is None:
+        nm_pixel_ratio = float(
+            stats.get("nm_pixel_ratio", OpticalFlowConfig.nm_pixel_ratio)
+        )
+    if frame_interval_s is None:
+        frame_interval_s = float(
+            stats.get("frame_interval_s", OpticalFlowConfig.frame_interval_s)
+        )
+    return OpticalFlowConfig(
+        nm_pixel_ratio=nm_pixel_ratio, frame_interval_s=frame_interval_s
+    )
+
+
+def recompute(
+    summary_csv: str,
+    nm_pixel_ratio: Optional[float] = None,
+    frame_interval_s: Optional[float] = None,
+    output_csv: Optional[str] = None,
+    gen_barcode: bool = False,
+) -> List[ChannelResults]:
+    """
+    Regenerate the flow results of a summary CSV in new units.
+
+    A unit left as None keeps the value saved with each channel's flow
+    statistics. Channels without saved flow statistics keep their flow
+    results, with a warning. The summary is written to output_csv, or over
+    summary_csv if none is given, with a barcode next to it if gen_barcode
+    is set.
+    """
+    results = read_csv_to_channel_results(summary_csv)
+    for result in results:
+        stats_path = flow_stats_path(result.filepath, result.channel)
+        if not os.path.exists(stats_path):
+            print(
+                f"Warning: No flow statistics for {result.filepath}, "
+                f"channel {result.channel}, keeping its flow results"
+            )
+            continue
+        stats = load_flow_stats(stats_path)
+        if None in (nm_pixel_ratio, frame_interval_s) and not (
+            "nm_pixel_ratio" in stats and "frame_interval_s" in stats
+        ):
+            print(
+                f"Warning: No saved units for {result.filepath}, "
+                f"channel {result.channel}, using the defaults for missing units"
+            )
+        opt_config = stats_config(stats, nm_pixel_ratio, frame_interval_s)
+        result.flow = flow_results_from_stats(stats, opt_config)
+
+    output_csv = output_csv or summary_csv
+    results_to_csv(results, output_csv, just_metrics=False)
+    if gen_barcode and results:
+        gen_combined_barcode(results, remove_extension(output_csv) + " Barcode")
+
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("summary_csv", help="summary CSV written by an analysis run")
+    parser.add_argument(
+        "--nm-pixel-ratio",
+        type=float,
+        help="nanometers per pixel, defaults to the ratio each channel used",
+    )
+    parser.add_argument(
+        "--frame-interval",
+        type=float,
+        help="seconds between frames, defaults to the interval each channel used",
+    )
+    parser.add_argument(
+        "--output", help="CSV to write, defaults to overwriting summary_csv"
+    )
+    parser.add_argument(
+        "--barcode", action="store_true", help="also regenerate the barcode"
+    )
+    args = parser.parse_args(argv)
+
+    recompute(
+        args.summary_csv,
+        args.nm_pixel_ratio,
+        args.frame_interval,
+        args.output,
+        args.barcode,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,34 @@
 import os
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
 
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.stats import kurtosis
 
 from core import IntensityDistributionConfig, OutputConfig, IntensityResults
 from utils import vprint
 from utils.analysis import (
+    HISTOGRAM_DTYPES,
+    INTENSITY_CHUNK_PIXELS,
+    IntensityStats,
+    bootstrap_intensity_stats,
     top_ten_average,
-    calc_mode_skewness,
-    calc_median_skewness,
-    calc_mode,
+    histogram_intensity_stats,
+    intensity_histogram,
+    stack_intensity_stats,
 )
+from utils.reader import get_channel
 from utils.setup import setup_csv_writer
 
+# Per-frame moments of the timecourse profile, saved next to each channel's output
+INTENSITY_TIMECOURSE_FILE = "IntensityTimecourse.npz"
+TIMECOURSE_METRICS = ("mean", "std", "kurtosis", "median_skewness", "mode_skewness")
+
+# Seed of the pixel sample and bootstrap resamples used when approximating
+APPROXIMATE_SEED = 0
+
+# Per-frame bootstrap errors of approximated statistics
+INTENSITY_APPROXIMATION_FILE = "IntensityApproximation.npz"
+
 
 def calculate_frame_indices(
     num_frames: int,
@@ -41,22 +55,64 @@ def calculate_frame_indices(
     return first_frame_idx, last_frame_idx, num_frames_analysis
 
 
+def calculate_window_frames(
+    num_frames: int, int_config: IntensityDistributionConfig
+) -> List[int]:
+    """Frames of the first and last windows that are compared."""
+    first_frame_idx, last_frame_idx, num_frames_analysis = calculate_frame_indices(
+        num_frames, int_config
+    )
+    first_window = range(first_frame_idx, first_frame_idx + num_frames_analysis)
+    last_window = range(last_frame_idx - num_frames_analysis, last_frame_idx)
+    return sorted({i % num_frames for i in [*first_window, *last_window]})
+
+
+def calculate_timecourse_frames(
+    num_frames: int, int_config: IntensityDistributionConfig
+) -> List[int]:
+    """Every timecourse_step-th frame of the video, none if the profile is off."""
+    if int_config.timecourse_step <= 0:
+        return []
+    return list(range(0, num_frames, int_config.timecourse_step))
+
+
+def calculate_intensity_frames(
+    num_frames: int, int_config: IntensityDistributionConfig
+) -> List[int]:
+    """Frames decoded by the intensity module: both windows and the timecourse."""
+    return sorted(
+        set(calculate_window_frames(num_frames, int_config))
+        | set(calculate_timecourse_frames(num_frames, int_config))
+    )
+
+
+def frame_chunks(frames_data: List[np.ndarray]) -> List[List[np.ndarray]]:
+    """Split frames into consecutive chunks of about INTENSITY_CHUNK_PIXELS."""
+    if not frames_data:
+        return []
+    chunk_size = max(1, INTENSITY_CHUNK_PIXELS // frames_data[0].size)
+    return [
+        frames_data[start : start + chunk_size]
+        for start in range(0, len(frames_data), chunk_size)
+    ]
+
+
 def calculate_frame_metrics(
     frames_data: List[np.ndarray],
 ) -> Tuple[List[float], List[float], List[float]]:
-    """Calculate kurtosis, median skew, and mode skew for a set of frames."""
-
-    def calc_frame_metric(metric, data: List[np.ndarray]) -> List[float]:
-        """Calculate a metric for each frame in the data."""
-        mets = []
-        for i in range(len(data)):
-            met = metric(data[i].flatten())
-            mets.append(met)
-        return mets
+    """
+    Calculate kurtosis, median skew, and mode skew for a set of frames.
 
-    kurtosis_values = calc_frame_metric(kurtosis, frames_data)
-    median_skew_values = calc_frame_metric(calc_median_skewness, frames_data)
-    mode_skew_values = calc_frame_metric(calc_mode_skewness, frames_data)
+    Frames are processed as (N, H*W) float32 blocks, chunked to bound memory,
+    with the moments of a whole block computed in one vectorized call.
+    """
+    kurtosis_values, median_skew_values, mode_skew_values = [], [], []
+    for chunk in frame_chunks(frames_data):
+        stats = stack_intensity_stats(np.stack(chunk))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kurtosis_values.extend(stats.kurtosis.tolist())
+            median_skew_values.extend(stats.median_skewness.tolist())
+            mode_skew_values.extend(stats.mode_skewness.tolist())
 
     return kurtosis_values, median_skew_values, mode_skew_values
 
@@ -65,12 +121,23 @@ def write_intensity_data(
     csvwriter, frames_data: List[np.ndarray], frame_indices: List[int]
 ):
     """Write intensity histogram data to CSV."""
+    histograms = [
+        np.unique(frame_data, return_counts=True) for frame_data in frames_data
+    ]
+    write_intensity_histograms(csvwriter, histograms, frame_indices)
+
+
+def write_intensity_histograms(
+    csvwriter,
+    histograms: List[Tuple[np.ndarray, np.ndarray]],
+    frame_indices: List[int],
+):
+    """Write precomputed (values, counts) intensity histograms to CSV."""
     if not csvwriter:
         return
 
-    for frame_data, frame_idx in zip(frames_data, frame_indices):
+    for (frame_values, frame_counts), frame_idx in zip(histograms, frame_indices):
         csvwriter.writerow([f"Frame {frame_idx}"])
-        frame_values, frame_counts = np.unique(frame_data, return_counts=True)
         csvwriter.writerow(frame_values)
         csvwriter.writerow(frame_counts)
         csvwriter.writerow([])
@@ -81,12 +148,19 @@ def analyze_intensity_metrics(
 ) -> Tuple[float, float, float, float, float, float]:
     """Calculate intensity distribution metrics from frame data."""
     # Calculate metrics for first and last frame sets
-    first_kurt, first_median_skew, first_mode_skew = calculate_frame_metrics(
-        first_frames_data
-    )
-    last_kurt, last_median_skew, last_mode_skew = calculate_frame_metrics(
-        last_frames_data
-    )
+    first_metrics = calculate_frame_metrics(first_frames_data)
+    last_metrics = calculate_frame_metrics(last_frames_data)
+
+    return aggregate_intensity_metrics(first_metrics, last_metrics)
+
+
+def aggregate_intensity_metrics(
+    first_metrics: Tuple[List[float], List[float], List[float]],
+    last_metrics: Tuple[List[float], List[float], List[float]],
+) -> Tuple[float, float, float, float, float, float]:
+    """Combine per-frame (kurtosis, median skew, mode skew) lists of both windows."""
+    first_kurt, first_median_skew, first_mode_skew = first_metrics
+    last_kurt, last_median_skew, last_mode_skew = last_metrics
 
     # Combine and calculate aggregated metrics
     total_kurt = first_kurt + last_kurt
@@ -116,106 +190,318 @@ def analyze_intensity_metrics(
     )
 
 
-def analyze_intensity_distribution(
-    file: np.ndarray,
-    name: str,
-    channel: int,
-    int_config: IntensityDistributionConfig,
-    out_config: OutputConfig,
-) -> Tuple[Optional[plt.Figure], IntensityResults]:
-    """
-    Analyze intensity distribution changes between first and last frames.
-
-    Returns:
-        Tuple of (matplotlib figure or None, IntensityResults)
-    """
-    vprint("Beginning Intensity Distribution Analysis...")
-
-    image = file[:, :, :, channel]
-    num_frames = image.shape[0]
-
-    # Error Checking: Empty Image
-    if (image == 0).all():
-        return None, IntensityResults(flag=1)
-
-    # Calculate frame indices using extracted function
-    first_frame_idx, last_frame_idx, num_frames_analysis = calculate_frame_indices(
-        num_frames, int_config
+def save_intensity_timecourse(
+    filepath: str, frames: np.ndarray, metrics: Dict[str, np.ndarray]
+) -> None:
+    """Save the per-frame timecourse moments as a compact float32 array file."""
+    np.savez(filepath, frame=frames, **metrics)
+
+
+def save_approximation_errors(
+    filepath: str, errors: Dict[int, np.ndarray], exact_frames: List[int]
+) -> None:
+    """Save each approximated frame's scaled bootstrap errors and any fallback."""
+    frames = np.array(sorted(errors), dtype=int)
+    values = np.array([errors[i] for i in frames], dtype=np.float32).reshape(-1, 3)
+    np.savez(
+        filepath,
+        frame=frames,
+        kurtosis_error=values[:, 0],
+        median_skewness_error=values[:, 1],
+        mode_skewness_error=values[:, 2],
+        exact=np.isin(frames, exact_frames),
     )
 
-    # Extract frame data
-    first_frames_data = [
-        image[i]
-        for i in range(first_frame_idx, first_frame_idx + num_frames_analysis, 1)
-    ]
-    last_frames_data = [
-        image[i] for i in range(last_frame_idx - num_frames_analysis, last_frame_idx, 1)
-    ]
 
-    # Check for saturation (flag = 2)
-    flag = 0
-    if all(
-        [
-            np.max(frame) == calc_mode(frame)
-            for frame in first_frames_data + last_frames_data
-        ]
+class IntensityAnalyzer:
+    """
+    Streaming intensity distribution analysis for one channel.
+
+    Per-frame moments are computed as each frame of the first and last
+    windows is pushed with `consume`, so frames are not kept in memory.
+    For uint8/uint16 frames all of them come from one bincount histogram per
+    frame. Other frames are queued into blocks of INTENSITY_CHUNK_PIXELS and
+    their moments computed a block at a time, with the peak of each frame's
+    histogram as its mode, see binned_mode.
+    `finalize` compares the two windows and returns IntensityResults.
+
+    With a `timecourse_step`, the moments of every k-th frame of the video
+    are also kept and saved to INTENSITY_TIMECOURSE_FILE, see
+    save_intensity_timecourse. Only the window frames count towards the
+    results and flags.
+
+    With `approximate`, the statistics of frames other than uint8/uint16 are
+    estimated from the same seeded random sample of `approximate_pixels`
+    pixels, so the cost per frame does not grow with the sensor size.
+    Bootstrap errors of the kurtosis and skewness estimates, scaled to each
+    metric, are kept per frame, and a frame whose errors exceed
+    `approximate_tolerance` is computed exactly instead. uint8/uint16 frames
+    are always exact, since their histogram path is already cheaper.
+    """
+
+    def __init__(
+        self,
+        num_frames: int,
+        name: str,
+        int_config: IntensityDistributionConfig,
+        out_config: OutputConfig,
     ):
-        flag = 2
+        vprint("Beginning Intensity Distribution Analysis...")
 
-    # Setup CSV writer if needed
-    csvwriter, myfile = None, None
-    if out_config.save_intermediates:
-        filename = os.path.join(name, "IntensityDistribution.csv")
-        csvwriter, myfile = setup_csv_writer(filename)
+        self.num_frames = num_frames
+        self.name = name
+        self.out_config = out_config
+        self.int_config = int_config
+        self.is_empty = True
 
-        # Write data for both first and last frame sets
-        first_indices = list(
+        # Calculate frame indices using extracted function
+        first_frame_idx, last_frame_idx, num_frames_analysis = calculate_frame_indices(
+            num_frames, int_config
+        )
+        self.first_indices = list(
             range(first_frame_idx, first_frame_idx + num_frames_analysis)
         )
-        last_indices = list(range(last_frame_idx - num_frames_analysis, last_frame_idx))
-
-        write_intensity_data(csvwriter, first_frames_data, first_indices)
-        write_intensity_data(csvwriter, last_frames_data, last_indices)
-
-    # Calculate intensity metrics using extracted function
-    (
-        max_kurtosis,
-        max_median_skew,
-        max_mode_skew,
-        kurtosis_diff,
-        median_skew_diff,
-        mode_skew_diff,
-    ) = analyze_intensity_metrics(first_frames_data, last_frames_data)
+        self.last_indices = list(
+            range(last_frame_idx - num_frames_analysis, last_frame_idx)
+        )
+        self.frames = calculate_intensity_frames(num_frames, int_config)
+        self._window_frames = set(calculate_window_frames(num_frames, int_config))
+        self._timecourse_frames = set(
+            calculate_timecourse_frames(num_frames, int_config)
+        )
 
-    # Create visualization plot
-    fig = None
-    if out_config.save_graphs:
-        first_frame = image[first_frame_idx]
         # Handle last frame selection (matching original logic)
-        final_frame_idx = (
+        self.first_frame_idx = first_frame_idx
+        self.final_frame_idx = (
             last_frame_idx - 1 if last_frame_idx <= num_frames else num_frames - 1
         )
-        last_frame = image[final_frame_idx]
-        max_intensity = 1.1 * np.max(image)
 
-        from visualization import save_intensity_plot
+        self.is_saturated = True
+        self.max_intensity = 0
+        self._frame_metrics: Dict[int, Tuple[float, float, float]] = {}
+        self._block: List[Tuple[int, np.ndarray]] = []
+        self._histograms: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._plot_frames: Dict[int, np.ndarray] = {}
+        self._timecourse: Dict[int, Tuple[float, ...]] = {}
+
+        # Pixel sample and per-frame bootstrap errors when approximating
+        self._rng = np.random.default_rng(APPROXIMATE_SEED)
+        self._sample_indices: Optional[np.ndarray] = None
+        self.approximation_errors: Dict[int, np.ndarray] = {}
+        self.exact_frames: List[int] = []
+
+    def consume(self, frame_idx: int, frame: np.ndarray) -> None:
+        """Compute the intensity moments of the next frame."""
+        in_window = frame_idx in self._window_frames
+        self.is_empty = self.is_empty and not (in_window and frame.any())
+
+        histogram = None
+        stats = None
+        if self.int_config.approximate and frame.dtype not in HISTOGRAM_DTYPES:
+            stats = self._approximate_stats(frame_idx, frame)
+
+        if stats is not None:
+            self._record_stats([frame_idx], stats)
+        elif frame.dtype in HISTOGRAM_DTYPES:
+            histogram = intensity_histogram(frame)
+            self._record_stats([frame_idx], histogram_intensity_stats(*histogram))
+        else:
+            self._block.append((frame_idx, np.array(frame, dtype=np.float32)))
+            if len(self._block) * frame.size >= INTENSITY_CHUNK_PIXELS:
+                self._flush_block()
+
+        if self.out_config.save_intermediates and in_window:
+            if histogram is None:
+                histogram = np.unique(frame, return_counts=True)
+            self._histograms[frame_idx] = histogram
+
+        if self.out_config.save_graphs and in_window:
+            plot_frames = (self.first_frame_idx, self.final_frame_idx)
+            if frame_idx in [i % self.num_frames for i in plot_frames]:
+                self._plot_frames[frame_idx] = frame
+
+    def _approximate_stats(
+        self, frame_idx: int, frame: np.ndarray
+    ) -> Optional[IntensityStats]:
+        """Statistics estimated from the pixel sample, None if too uncertain."""
+        if self._sample_indices is None:
+            sample_size = min(self.int_config.approximate_pixels, frame.size)
+            self._sample_indices = np.sort(
+                self._rng.choice(frame.size, sample_size, replace=False)
+            )
+
+        sample = np.asarray(frame).reshape(-1)[self._sample_indices]
+        stats, errors = bootstrap_intensity_stats(sample, self._rng)
+        self.approximation_errors[frame_idx] = errors
+
+        # Undefined (NaN) errors also fall back to the exact statistics
+        if not np.all(errors <= self.int_config.approximate_tolerance):
+            self.exact_frames.append(frame_idx)
+            return None
+        return stats
+
+    def _flush_block(self) -> None:
+        """Compute the moments of all queued frames in one vectorized call."""
+        if not self._block:
+            return
+        frame_indices, frames = zip(*self._block)
+        self._block = []
+        stats = stack_intensity_stats(np.stack(frames))
+        self._record_stats(list(frame_indices), stats)
+
+    def _record_stats(self, frame_indices: List[int], stats: IntensityStats) -> None:
+        """Keep the per-frame metrics and update the saturation check and max."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns = [
+                np.atleast_1d(getattr(stats, metric)).tolist()
+                for metric in TIMECOURSE_METRICS + ("max", "mode")
+            ]
+
+        for frame_idx, *frame_stats, frame_max, frame_mode in zip(
+            frame_indices, *columns
+        ):
+            if frame_idx in self._timecourse_frames:
+                self._timecourse[frame_idx] = tuple(frame_stats)
+            if frame_idx not in self._window_frames:
+                continue
+
+            _, _, kurt, median_skew, mode_skew = frame_stats
+            self._frame_metrics[frame_idx] = (kurt, median_skew, mode_skew)
+
+            # Check for saturation (flag = 2)
+            self.is_saturated = self.is_saturated and frame_max == frame_mode
+            self.max_intensity = max(self.max_intensity, frame_max)
+
+    def timecourse(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Timecourse frame indices and each metric's per-frame values."""
+        self._flush_block()
+        frames = np.array(sorted(self._timecourse), dtype=int)
+        values = np.array([self._timecourse[i] for i in frames], dtype=np.float32)
+        values = values.reshape(len(frames), len(TIMECOURSE_METRICS))
+        return frames, dict(zip(TIMECOURSE_METRICS, values.T))
+
+    def _window_metrics(
+        self, indices: List[int]
+    ) -> Tuple[List[float], List[float], List[float]]:
+        """Per-frame metric lists for a window, in window order."""
+        metrics = [self._frame_metrics[i % self.num_frames] for i in indices]
+        kurt, median_skew, mode_skew = zip(*metrics) if metrics else ([], [], [])
+        return list(kurt), list(median_skew), list(mode_skew)
+
+    def timecourse_figure(self) -> Optional[plt.Figure]:
+        """Plot of the timecourse, None if there is none or graphs are off."""
+        if not (self._timecourse_frames and self.out_config.save_graphs):
+            return None
+
+        from visualization import save_intensity_timecourse_plot
+
+        return save_intensity_timecourse_plot(*self.timecourse())
+
+    def close(self) -> None:
+        """Drop queued frames; the analyzer holds no other resources."""
+        self._block = []
+
+    def finalize(self) -> Tuple[Optional[plt.Figure], IntensityResults]:
+        """Compare the first and last windows and return IntensityResults."""
+        self._flush_block()
+
+        if self.approximation_errors:
+            max_errors = np.nanmax(list(self.approximation_errors.values()), axis=0)
+            vprint(
+                "Approximate intensity statistics, largest bootstrap errors "
+                "(kurtosis, median skew, mode skew): "
+                f"{', '.join(f'{error:.3g}' for error in max_errors)}; "
+                f"{len(self.exact_frames)} of {len(self.approximation_errors)} "
+                "frames computed exactly"
+            )
+            if os.path.isdir(self.name):
+                save_approximation_errors(
+                    os.path.join(self.name, INTENSITY_APPROXIMATION_FILE),
+                    self.approximation_errors,
+                    self.exact_frames,
+                )
+
+        # Save the timecourse next to the channel's other outputs
+        if self._timecourse_frames and os.path.isdir(self.name):
+            save_intensity_timecourse(
+                os.path.join(self.name, INTENSITY_TIMECOURSE_FILE), *self.timecourse()
+            )
+
+        # Error Checking: Empty Image
+        if self.is_empty:
+            return None, IntensityResults(flag=1)
+
+        flag = 2 if self.is_saturated else 0
 
-        fig = save_intensity_plot(
-            first_frame, last_frame, first_frame_idx, final_frame_idx, max_intensity
+        # Write data for both first and last frame sets
+        if self.out_config.save_intermediates:
+            filename = os.path.join(self.name, "IntensityDistribution.csv")
+            csvwriter, myfile = setup_csv_writer(filename)
+            for indices in (self.first_indices, self.last_indices):
+                histograms = [self._histograms[i % self.num_frames] for i in indices]
+                write_intensity_histograms(csvwriter, histograms, indices)
+            myfile.close()
+
+        # Calculate intensity metrics using extracted function
+        (
+            max_kurtosis,
+            max_median_skew,
+            max_mode_skew,
+            kurtosis_diff,
+            median_skew_diff,
+            mode_skew_diff,
+        ) = aggregate_intensity_metrics(
+            self._window_metrics(self.first_indices),
+            self._window_metrics(self.last_indices),
         )
 
-    # Clean up CSV file
-    if myfile:
-        myfile.close()
-
-    results = IntensityResults(
-        max_kurtosis=max_kurtosis,
-        max_median_skew=max_median_skew,
-        max_mode_skew=max_mode_skew,
-        kurtosis_diff=kurtosis_diff,
-        median_skew_diff=median_skew_diff,
-        mode_skew_diff=mode_skew_diff,
-        flag=flag,
-    )
+        # Create visualization plot
+        fig = None
+        if self.out_config.save_graphs:
+            first_frame = self._plot_frames[self.first_frame_idx % self.num_frames]
+            last_frame = self._plot_frames[self.final_frame_idx % self.num_frames]
+            max_intensity = 1.1 * self.max_intensity
+
+            from visualization import save_intensity_plot
+
+            fig = save_intensity_plot(
+                first_frame,
+                last_frame,
+                self.first_frame_idx,
+                self.final_frame_idx,
+                max_intensity,
+            )
+
+        results = IntensityResults(
+            max_kurtosis=max_kurtosis,
+            max_median_skew=max_median_skew,
+            max_mode_skew=max_mode_skew,
+            kurtosis_diff=kurtosis_diff,
+            median_skew_diff=median_skew_diff,
+            mode_skew_diff=mode_skew_diff,
+            flag=flag,
+        )
+
+        return fig, results
+
+
+def analyze_intensity_distribution(
+    file: np.ndarray,
+    name: str,
+    channel: int,
+    int_config: IntensityDistributionConfig,
+    out_config: OutputConfig,
+) -> Tuple[Optional[plt.Figure], IntensityResults]:
+    """
+    Analyze intensity distribution changes between first and last frames.
+
+    Returns:
+        Tuple of (matplotlib figure or None, IntensityResults)
+    """
+    image = get_channel(file, channel)
+
+    analyzer = IntensityAnalyzer(len(image), name, int_config, out_config)
+    for frame_idx in analyzer.frames:
+        analyzer.consume(frame_idx, image[frame_idx])
 
-    return fig, results
+    return analyzer.finalize()
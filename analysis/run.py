@@ -1,64 +1,213 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 
-from analysis import analyze_flow, analyze_intensity_distribution, analyze_binarization
-from core import BarcodeConfig, ChannelResults
+from analysis.binarization import BinarizationAnalyzer
+from analysis.flow import FlowAnalyzer
+from analysis.intensity_distribution import IntensityAnalyzer
+from core import ChannelResults, EffectiveConfig
+from utils.cache import ModuleResultCache
+from utils.reader import get_channel
+
+
+# ChannelResults field holding each module's results
+MODULE_RESULTS = {
+    "Binarization": "binarization",
+    "Optical Flow": "flow",
+    "Intensity Distribution": "intensity",
+}
+
+
+def enabled_modules(config: EffectiveConfig) -> List[str]:
+    """Names of the analysis modules the config enables."""
+    enabled = {
+        "Binarization": config.analysis.enable_binarization,
+        "Optical Flow": config.analysis.enable_optical_flow,
+        "Intensity Distribution": config.analysis.enable_intensity_distribution,
+    }
+    return [module for module, is_enabled in enabled.items() if is_enabled]
+
+
+def cached_module_results(
+    module_cache: Optional[ModuleResultCache],
+    channel: int,
+    config: EffectiveConfig,
+) -> Dict[str, object]:
+    """Results of the enabled modules that module_cache holds for a channel."""
+    reused = {}
+    if module_cache is not None:
+        for module in enabled_modules(config):
+            module_results = module_cache.get(channel, module, config)
+            if module_results is not None:
+                reused[module] = module_results
+    return reused
+
+
+def log_module_failure(
+    fail_file_loc: str, channel: int, module: str, e: Exception
+) -> None:
+    """Record a module failure for a channel in the failed files log."""
+    with open(fail_file_loc, "a", encoding="utf-8") as log_file:
+        log_file.write(f"Channel {channel}, Module: {module}, Exception: {str(e)}\n")
+
+
+def drop_consumer(
+    consumers: Dict[str, object],
+    module: str,
+    channel: int,
+    fail_file_loc: str,
+    e: Exception,
+) -> None:
+    """Log a consumer's failure and remove it from the stream, releasing it."""
+    consumer = consumers.pop(module)
+    try:
+        log_module_failure(fail_file_loc, channel, module, e)
+    finally:
+        consumer.close()
+
+
+def stream_frames(
+    image: np.ndarray,
+    consumers: Dict[str, object],
+    channel: int,
+    fail_file_loc: str,
+) -> None:
+    """
+    Decode each needed frame once and push it to every consumer that uses it.
+
+    Consumers expose the `frames` they need, a `consume(frame_idx, frame)`
+    method and a `close()` method. Frames are visited in ascending order. A
+    consumer that raises, or whose frame cannot be decoded, is logged, closed
+    and dropped from the stream, the others keep running.
+    """
+    consumer_frames = {module: set(c.frames) for module, c in consumers.items()}
+    frame_plan = sorted(set().union(*consumer_frames.values()))
+
+    for frame_idx in frame_plan:
+        users = [m for m in consumers if frame_idx in consumer_frames[m]]
+        if not users:
+            continue
+
+        try:
+            frame = image[frame_idx]
+        except Exception as e:
+            for module in users:
+                drop_consumer(consumers, module, channel, fail_file_loc, e)
+            continue
+
+        for module in users:
+            try:
+                consumers[module].consume(frame_idx, frame)
+            except Exception as e:
+                drop_consumer(consumers, module, channel, fail_file_loc, e)
 
 
 def run_analysis_pipeline(
     filepath: str,
     file: np.ndarray,
     channel: int,
-    config: BarcodeConfig,
+    config: EffectiveConfig,
     output_dir: str,
     fail_file_loc: str,
+    module_cache: Optional[ModuleResultCache] = None,
+    reused: Optional[Dict[str, object]] = None,
 ) -> Tuple[ChannelResults, List[plt.Figure]]:
-    """Run all enabled analysis modules for a single channel."""
+    """
+    Run all enabled analysis modules for a single channel in one decode pass.
+
+    Modules whose results for this channel and their current settings are in
+    module_cache are not run, and the cached results are used instead. The
+    results of the modules that do run are added to the cache. Callers that
+    already looked the modules up pass their cached_module_results as reused.
+    """
     results = ChannelResults(filepath=filepath, channel=channel)
     figures = []
 
-    # Run binarization analysis
-    if config.analysis.enable_binarization:
+    image = get_channel(file, channel)
+    num_frames = len(image)
+
+    # Results of enabled modules that are cached and need not run
+    if reused is None:
+        reused = cached_module_results(module_cache, channel, config)
+    to_run = [m for m in enabled_modules(config) if m not in reused]
+
+    # Set up a streaming consumer for each enabled module
+    consumers = {}
+    if "Binarization" in to_run:
         try:
-            bfig, binarization_results = analyze_binarization(
-                file, output_dir, channel, config.binarization, config.output
+            consumers["Binarization"] = BinarizationAnalyzer(
+                num_frames, output_dir, config.binarization, config.output
             )
+        except Exception as e:
+            log_module_failure(fail_file_loc, channel, "Binarization", e)
+
+    if "Optical Flow" in to_run:
+        try:
+            consumers["Optical Flow"] = FlowAnalyzer(
+                num_frames, output_dir, config.optical_flow, config.output
+            )
+        except Exception as e:
+            log_module_failure(fail_file_loc, channel, "Optical Flow", e)
+
+    if "Intensity Distribution" in to_run:
+        try:
+            consumers["Intensity Distribution"] = IntensityAnalyzer(
+                num_frames, output_dir, config.intensity_distribution, config.output
+            )
+        except Exception as e:
+            log_module_failure(fail_file_loc, channel, "Intensity Distribution", e)
+
+    # Decode each frame once and feed every module from the same pass
+    started = list(consumers.values())
+    stream_frames(image, consumers, channel, fail_file_loc)
+    finished = []
+
+    # Finalize binarization analysis
+    if "Binarization" in consumers:
+        try:
+            bfig, binarization_results = consumers["Binarization"].finalize()
             results.binarization = binarization_results
             if bfig and config.output.save_graphs:
                 figures.append(bfig)
+            finished.append("Binarization")
         except Exception as e:
-            with open(fail_file_loc, "a", encoding="utf-8") as log_file:
-                log_file.write(
-                    f"Channel {channel}, Module: Binarization, Exception: {str(e)}\n"
-                )
+            log_module_failure(fail_file_loc, channel, "Binarization", e)
 
-    # Run optical flow analysis
-    if config.analysis.enable_optical_flow:
+    # Finalize optical flow analysis
+    if "Optical Flow" in consumers:
         try:
-            results.flow = analyze_flow(
-                file, output_dir, channel, config.optical_flow, config.output
-            )
+            results.flow = consumers["Optical Flow"].finalize()
+            finished.append("Optical Flow")
         except Exception as e:
-            with open(fail_file_loc, "a", encoding="utf-8") as log_file:
-                log_file.write(
-                    f"Channel {channel}, Module: Optical Flow, Exception: {str(e)}\n"
-                )
+            log_module_failure(fail_file_loc, channel, "Optical Flow", e)
 
-    # Run intensity distribution analysis
-    if config.analysis.enable_intensity_distribution:
+    # Finalize intensity distribution analysis
+    if "Intensity Distribution" in consumers:
         try:
-            ifig, intensity_results = analyze_intensity_distribution(
-                file, output_dir, channel, config.intensity_distribution, config.output
-            )
+            ifig, intensity_results = consumers["Intensity Distribution"].finalize()
             results.intensity = intensity_results
             if ifig and config.output.save_graphs:
                 figures.append(ifig)
+            tfig = consumers["Intensity Distribution"].timecourse_figure()
+            if tfig and config.output.save_graphs:
+                figures.append(tfig)
+            finished.append("Intensity Distribution")
         except Exception as e:
-            with open(fail_file_loc, "a", encoding="utf-8") as log_file:
-                log_file.write(
-                    f"Channel {channel}, Module: Intensity Distribution, Exception: {str(e)}\n"
-                )
+            log_module_failure(fail_file_loc, channel, "Intensity Distribution", e)
+
+    results.failed_modules = [m for m in to_run if m not in finished]
+
+    # Release every module, including any whose finalize failed
+    for consumer in started:
+        consumer.close()
+
+    # Cache the results of modules that ran, and fill in those that were reused
+    if module_cache is not None:
+        for module in finished:
+            module_results = getattr(results, MODULE_RESULTS[module])
+            module_cache.put(channel, module, config, module_results)
+    for module, module_results in reused.items():
+        setattr(results, MODULE_RESULTS[module], module_results)
 
     return results, figures
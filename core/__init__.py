@@ -18,6 +18,7 @@ from core.config import (
     PreviewConfig,
     AggregationConfig,
     BarcodeConfig,
+    EffectiveConfig,
 )
 
 from core.results import (
@@ -26,6 +27,7 @@ from core.results import (
     FlowResults,
     IntensityResults,
     ChannelResults,
+    ResultsTable,
     sort_channel_results_by_metric,
 )
 
@@ -45,10 +47,12 @@ __all__ = [
     "BarcodeConfig",
     "PreviewConfig",
     "AggregationConfig",
+    "EffectiveConfig",
     "ResultsBase",
     "BinarizationResults",
     "FlowResults",
     "IntensityResults",
     "ChannelResults",
+    "ResultsTable",
     "sort_channel_results_by_metric",
 ]
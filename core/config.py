@@ -5,7 +5,7 @@ Generate GUI wrappers by running: python _config.py
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 import yaml
 from abc import ABC
 
@@ -80,6 +80,11 @@ class AnalysisConfig(BaseConfig):
     enable_binarization: bool = False
     enable_optical_flow: bool = False
     enable_intensity_distribution: bool = False
+    workers: int = 1  # files processed in parallel; 1 runs serially
+    use_cache: bool = False  # reuse results of files unchanged since an earlier run
+    cache_dir: str = ""  # result cache location; empty uses ~/.cache/barcode
+    cache_size_mb: int = 1024  # least recently used results are evicted above this
+    resume: bool = False  # skip files finished by an interrupted run, see journal
 
 
 @dataclass
@@ -102,6 +107,8 @@ class BinarizationConfig(BaseConfig):
     frame_stop_percent: float = 1.0  # 0.9 to 1.0
     binning_number: int = 2 # 2, 4, 8 as the default
     area_size: int = 500 #default area size TO BE ADJUSTED BY USER ONCE WE FIGURE THIS OUT!
+    batch_size: int = 16  # frames binarized together per block; bounds memory
+    threads: int = 1  # worker threads binarizing blocks in parallel
 
 
 @dataclass
@@ -114,6 +121,10 @@ class OpticalFlowConfig(BaseConfig):
     nm_pixel_ratio: float = 1.0  # 1 to 1,000,000
     frame_interval_s: int = 1  # 1 to 1000
     binning_number: int = 2 # 2, 4, 8 as the default
+    bin_frames: bool = False  # bin frames by binning_number before computing flow
+    engine: str = "farneback"  # "farneback", "dis" or "piv"
+    threads: int = 1  # worker threads computing frame pairs in parallel
+    warm_start: bool = False  # start each pair from the previous pair's flow
 
 
 @dataclass
@@ -123,6 +134,10 @@ class IntensityDistributionConfig(BaseConfig):
     first_frame: int = 1  # minimum 1
     last_frame: int = 0  # 0 means auto-detect last frame
     frames_evaluation_percent: float = 0.1  # 0.01 to 0.2
+    timecourse_step: int = 0  # profile every k-th frame of the video; 0 disables
+    approximate: bool = False  # estimate statistics from a random pixel sample
+    approximate_pixels: int = 65536  # pixels sampled per frame when approximating
+    approximate_tolerance: float = 0.1  # larger relative bootstrap errors fall back
 
 
 @dataclass
@@ -161,15 +176,29 @@ class BarcodeConfig:
         default_factory=IntensityDistributionConfig
     )
 
-    def save_to_yaml(self, filepath: str) -> None:
-        """Save configuration to YAML file."""
+    def save_to_yaml(
+        self,
+        filepath: str,
+        file_overrides: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+    ) -> None:
+        """
+        Save configuration to YAML file.
+
+        Per-file overrides (e.g. ND2 metadata), keyed by filepath, are written
+        to a separate `file_overrides` section and ignored when loading.
+        """
         config_data = {}
         for field_name in self.__dataclass_fields__:
             subconfig = getattr(self, field_name)
             config_data[field_name] = subconfig.to_dict()
 
+        if file_overrides:
+            config_data[FILE_OVERRIDES_KEY] = file_overrides
+
         with open(filepath, "w") as f:
-            yaml.dump(config_data, f, default_flow_style=False, indent=2)
+            yaml.dump(
+                plain_values(config_data), f, default_flow_style=False, indent=2
+            )
 
     @classmethod
     def load_from_yaml(cls, filepath: str) -> "BarcodeConfig":
@@ -201,6 +230,8 @@ class BarcodeConfig:
 
         kwargs = {}
         for subconfig_class_name, subconfig_data in config_data.items():
+            if subconfig_class_name == FILE_OVERRIDES_KEY:
+                continue
 
             assert (
                 subconfig_class_name in cls.__dataclass_fields__
@@ -279,6 +310,92 @@ class BarcodeConfig:
         )
 
 
+@dataclass(frozen=True, eq=False)
+class EffectiveConfig:
+    """
+    Configuration used to analyze one file: the user's BarcodeConfig with any
+    overrides derived from the file (e.g. ND2 metadata) applied.
+
+    Each section is a private copy made at construction, so the user config is
+    never modified and files can be processed concurrently. Instances compare
+    and hash by their settings, so they can be used as cache keys.
+    """
+
+    channels: ChannelConfig
+    quality: QualityConfig
+    analysis: AnalysisConfig
+    output: OutputConfig
+    binarization: BinarizationConfig
+    optical_flow: OpticalFlowConfig
+    intensity_distribution: IntensityDistributionConfig
+    overrides: Tuple[Tuple[str, str, Any], ...] = ()
+
+    @classmethod
+    def from_config(
+        cls,
+        config: BarcodeConfig,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> "EffectiveConfig":
+        """Snapshot a BarcodeConfig, applying {section: {field: value}} overrides."""
+        overrides = overrides or {}
+        for section_name, section_overrides in overrides.items():
+            assert (
+                section_name in BarcodeConfig.__dataclass_fields__
+            ), f"Unknown configuration section: {section_name}"
+            for field_name in section_overrides:
+                assert (
+                    field_name in getattr(config, section_name).__dataclass_fields__
+                ), f"Unknown {section_name} setting: {field_name}"
+
+        sections = {}
+        for section_name in BarcodeConfig.__dataclass_fields__:
+            subconfig = getattr(config, section_name)
+            data = subconfig.to_dict()
+            data.update(overrides.get(section_name, {}))
+            sections[section_name] = type(subconfig).from_dict(data)
+
+        flat_overrides = tuple(
+            sorted(
+                (section_name, field_name, value)
+                for section_name, section_overrides in overrides.items()
+                for field_name, value in section_overrides.items()
+            )
+        )
+        return cls(**sections, overrides=flat_overrides)
+
+    def overrides_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the applied overrides as {section: {field: value}}."""
+        result: Dict[str, Dict[str, Any]] = {}
+        for section_name, field_name, value in self.overrides:
+            result.setdefault(section_name, {})[field_name] = value
+        return result
+
+    def _key(self) -> Tuple:
+        return tuple(
+            (section_name, tuple(getattr(self, section_name).to_dict().items()))
+            for section_name in BarcodeConfig.__dataclass_fields__
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EffectiveConfig):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+
+# Top-level settings.yaml key holding per-file overrides
+FILE_OVERRIDES_KEY = "file_overrides"
+
+
+def plain_values(data: Any) -> Any:
+    """Replace NumPy scalars in nested dicts, which safe_load cannot read back."""
+    if isinstance(data, dict):
+        return {key: plain_values(value) for key, value in data.items()}
+    return data.item() if hasattr(data, "item") else data
+
+
 # === CONFIG GENERATION SETUP ===
 # Define which configs should get GUI wrappers (edit this list as needed)
 GUI_CONFIG_CLASSES = [
@@ -1,25 +1,34 @@
+import multiprocessing
 import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
-
-import numpy as np
+from typing import Collection, Dict, List, Optional, Tuple, Union
 
 from analysis import run_analysis_pipeline
-from core import BarcodeConfig, ChannelResults
+from analysis.run import cached_module_results
+from analysis.binarization import calculate_binarization_frames
+from analysis.flow import calculate_flow_frames
+from analysis.intensity_distribution import calculate_intensity_frames
+from core import BarcodeConfig, ChannelResults, EffectiveConfig
 from utils import vprint, set_verbose, Timer
-from utils.analysis import check_channel_dim
-from utils.reader import read_file, extract_nd2_metadata
+from utils.analysis import check_frames_dim
+from utils.cache import ModuleResultCache, ResultCache, file_fingerprint
+from utils.journal import ResultsJournal
+from utils.reader import VideoReader, PlannedVideo, read_file, extract_nd2_metadata
 from utils.setup import (
     create_output_directories,
     create_channel_output_dir,
     discover_files,
+    journal_path,
     setup_paths,
 )
-from utils.writer import gen_combined_barcode, results_to_csv
+from utils.writer import ResultsWriter, gen_combined_barcode
 
 
 def determine_channels_to_process(
-    config: BarcodeConfig, total_channels: int
+    config: Union[BarcodeConfig, EffectiveConfig], total_channels: int
 ) -> List[int]:
     """Determine which channels to process based on config settings."""
     if config.channels.parse_all_channels:
@@ -37,6 +46,71 @@ def determine_channels_to_process(
         return [channel_select]
 
 
+def plan_frames(
+    num_frames: int,
+    config: Union[BarcodeConfig, EffectiveConfig],
+    skip: Collection[str] = (),
+) -> List[int]:
+    """
+    Determine the union of frames needed by the enabled analysis modules.
+
+    Only these frames are decoded from the file for analysis. Modules named in
+    skip, e.g. those whose results are reused from the cache, need no frames.
+    """
+    module_frames: Dict[str, List[int]] = {}
+    if config.analysis.enable_binarization and "Binarization" not in skip:
+        module_frames["binarization"] = calculate_binarization_frames(
+            num_frames, config.binarization
+        )
+    if config.analysis.enable_optical_flow and "Optical Flow" not in skip:
+        module_frames["optical flow"] = calculate_flow_frames(
+            num_frames, config.optical_flow
+        )
+    if (
+        config.analysis.enable_intensity_distribution
+        and "Intensity Distribution" not in skip
+    ):
+        module_frames["intensity distribution"] = calculate_intensity_frames(
+            num_frames, config.intensity_distribution
+        )
+
+    frame_plan = sorted(set().union(*module_frames.values()))
+
+    module_counts = ", ".join(
+        f"{name}: {len(frames)}" for name, frames in module_frames.items()
+    )
+    vprint(
+        f"Frame plan: decoding {len(frame_plan)} of {num_frames} frames "
+        f"({100 * len(frame_plan) / num_frames:.1f}%)"
+        + (f" [{module_counts}]" if module_counts else "")
+    )
+    return frame_plan
+
+
+def open_summary_writer(
+    base_path: str, base_name: str, is_single_file: bool = False
+) -> ResultsWriter:
+    """Open the summary CSV that results are streamed to as files finish."""
+
+    if is_single_file:
+        # Single file: fail fast if can't write
+        csv_path = os.path.join(base_path, base_name + " summary.csv")
+        return ResultsWriter(csv_path, ChannelResults, just_metrics=False)
+
+    # Directory: try alternate names if file exists
+    csv_path = os.path.join(base_path, base_name + " Summary.csv")
+    try:
+        return ResultsWriter(csv_path, ChannelResults, just_metrics=False)
+    except:
+        counter = 1
+        while True:
+            csv_path = os.path.join(base_path, f"{base_name} Summary ({counter}).csv")
+            if not os.path.exists(csv_path):
+                break
+            counter += 1
+        return ResultsWriter(csv_path, ChannelResults, just_metrics=False)
+
+
 def save_analysis_results(
     all_results: List[ChannelResults],
     base_path: str,
@@ -45,38 +119,22 @@ def save_analysis_results(
     ff_loc: str,
     is_single_file: bool = False,
 ) -> None:
-    """Save analysis results to CSV, generate barcodes, and save config."""
+    """
+    Generate barcodes and save config for analysis results.
+
+    The summary CSV is streamed while files are processed, see
+    open_summary_writer.
+    """
 
     # Determine output paths
     if is_single_file:
-        csv_path = os.path.join(base_path, base_name + " summary.csv")
         barcode_path = os.path.join(base_path, base_name + " summary barcode")
         settings_path = os.path.join(base_path, base_name + " settings.yaml")
     else:
-        csv_path = os.path.join(base_path, base_name + " Summary.csv")
         barcode_path = os.path.join(base_path, base_name + "_Summary Barcode")
         settings_path = os.path.join(base_path, base_name + " Settings.yaml")
 
-    # Save CSV
-    if all_results:
-        if is_single_file:
-            # Single file: fail fast if can't write
-            results_to_csv(all_results, csv_path, just_metrics=False)
-        else:
-            # Directory: try alternate names if file exists
-            try:
-                results_to_csv(all_results, csv_path, just_metrics=False)
-            except:
-                counter = 1
-                while True:
-                    csv_path = os.path.join(
-                        base_path, f"{base_name} Summary ({counter}).csv"
-                    )
-                    if not os.path.exists(csv_path):
-                        break
-                    counter += 1
-                results_to_csv(all_results, csv_path, just_metrics=False)
-    else:
+    if not all_results:
         print("Warning: No results to write - all files may have failed processing")
 
     # Generate barcode if enabled
@@ -92,8 +150,13 @@ def save_analysis_results(
             with open(ff_loc, "a", encoding="utf-8") as log_file:
                 log_file.write(f"Unable to generate barcode, Exception: {str(e)}\n")
 
-    # Save config
-    config.save_to_yaml(settings_path)
+    # Save config, along with the overrides each file was analyzed with
+    file_overrides = {
+        result.filepath: result.config_overrides
+        for result in all_results
+        if result.config_overrides
+    }
+    config.save_to_yaml(settings_path, file_overrides)
 
     # Clean up empty fail file
     if os.stat(ff_loc).st_size == 0:
@@ -101,9 +164,19 @@ def save_analysis_results(
 
 
 def process_single_file(
-    filepath: str, config: BarcodeConfig, fail_file_loc: str, count: int, total: int
+    filepath: str,
+    config: BarcodeConfig,
+    fail_file_loc: str,
+    count: int,
+    total: int,
+    module_cache: Optional[ModuleResultCache] = None,
 ) -> Tuple[List[ChannelResults], int]:
-    """Process a single file and return analysis results."""
+    """
+    Process a single file and return analysis results.
+
+    With a module_cache, modules whose results for a channel are cached are
+    not run again, see run_analysis_pipeline.
+    """
 
     # Load and validate file
     try:
@@ -117,9 +190,28 @@ def process_single_file(
         raise TypeError("File not read by BARCODE.")
 
     print(f"File Dimensions: {file.shape}")
-    if not isinstance(file, np.ndarray):
+    if not isinstance(file, VideoReader):
         raise TypeError("File was not of the correct filetype")
 
+    with file:
+        channel_results = _process_channels(
+            filepath, file, config, fail_file_loc, module_cache
+        )
+        return channel_results, count
+
+
+def _process_channels(
+    filepath: str,
+    file: VideoReader,
+    config: BarcodeConfig,
+    fail_file_loc: str,
+    module_cache: Optional[ModuleResultCache] = None,
+) -> List[ChannelResults]:
+    """Run the enabled analysis modules on each selected channel of a file."""
+
+    # Snapshot the config for this file, with ND2 metadata applied
+    config = EffectiveConfig.from_config(config, extract_nd2_metadata(filepath, file))
+
     # Setup output directories
     figure_dir_name = create_output_directories(filepath)
 
@@ -131,8 +223,8 @@ def process_single_file(
     for channel in channels_to_process:
         vprint(f"Processing Channel: {channel}")
 
-        # Check for dim channels
-        is_dim = check_channel_dim(file[:, :, :, channel])
+        # Check for dim channels over the whole channel, before any analysis
+        is_dim = check_frames_dim(file.channel(channel))
         if is_dim and not config.quality.accept_dim_channels:
             vprint("Channel too dim, not enough signal, skipping...")
             continue
@@ -142,16 +234,25 @@ def process_single_file(
         # Create channel output directory
         channel_output_dir = create_channel_output_dir(figure_dir_name, channel)
 
-        # Handle ND2 metadata extraction here
-        extract_nd2_metadata(filepath, config)
+        # Decode only the frames of the modules that run, not the cached ones
+        reused = cached_module_results(module_cache, channel, config)
+        planned_file = PlannedVideo(file, plan_frames(len(file), config, reused))
 
         # Run analysis pipeline
         results, figures = run_analysis_pipeline(
-            filepath, file, channel, config, channel_output_dir, fail_file_loc
+            filepath,
+            planned_file,
+            channel,
+            config,
+            channel_output_dir,
+            fail_file_loc,
+            module_cache,
+            reused,
         )
 
         results.filepath = filepath
         results.channel = channel
+        results.config_overrides = config.overrides_dict()
         # Set dim channel flag
         results.dim_channel_flag = 1 if is_dim else 0
         results.intensity.flag += 1 if is_dim else 0
@@ -166,7 +267,104 @@ def process_single_file(
         channel_results.append(results)
         vprint("Channel Screening Completed")
 
-    return channel_results, count
+    return channel_results
+
+
+def _process_file_logged(
+    file_path: str,
+    config: BarcodeConfig,
+    ff_loc: str,
+    count: int,
+    total: int,
+    module_cache: Optional[ModuleResultCache] = None,
+) -> Tuple[Optional[List[ChannelResults]], int]:
+    """
+    Process a single file, logging failures instead of raising.
+
+    Returns None as the results for files that were skipped or failed.
+    """
+    try:
+        return process_single_file(
+            file_path, config, ff_loc, count, total, module_cache
+        )
+    except TypeError as e:
+        if "BARCODE" not in str(e):
+            print(e)
+    except Exception as e:
+        with open(ff_loc, "a", encoding="utf-8") as log_file:
+            log_file.write(f"File: {file_path}, Exception: {str(e)}\n")
+    return None, count
+
+
+def _process_file_cached(
+    file_path: str, config: BarcodeConfig, ff_loc: str, count: int, total: int
+) -> Tuple[Optional[List[ChannelResults]], int]:
+    """
+    Process a single file, reusing its cached results if it is unchanged.
+
+    The result cache is checked before the file is read. If the file's
+    results are not cached, the results of modules whose own settings did not
+    change are still reused, and only the other modules run. Results of files
+    that are analyzed are stored in it for later runs, unless a module failed:
+    like ModuleResultCache, only results of modules that finished are kept.
+    """
+    cache = ResultCache.from_config(config)
+    if cache is None:
+        return _process_file_logged(file_path, config, ff_loc, count, total)
+
+    key, module_cache = None, None
+    try:
+        fingerprint = file_fingerprint(file_path)
+        key = cache.key(fingerprint, config)
+        cached = cache.get(key)
+        # Figures of reused modules can't be redrawn, so rerun them all for graphs
+        if not config.output.save_graphs:
+            module_cache = cache.for_file(fingerprint)
+    except OSError:
+        cached = None  # Unreadable file or cache, analyze as usual
+
+    if cached is not None:
+        print(f"File {count} of {total}", flush=True)
+        print(file_path, flush=True)
+        vprint("File and settings unchanged, using cached results")
+        for result in cached:
+            result.filepath = file_path  # The same contents may have moved
+        return cached, count + 1
+
+    results, count = _process_file_logged(
+        file_path, config, ff_loc, count, total, module_cache
+    )
+    finished = results is not None and not any(r.failed_modules for r in results)
+    if finished and key is not None:
+        try:
+            cache.put(key, results)
+        except OSError as e:
+            vprint(f"Unable to cache results of {file_path}: {e}")
+    return results, count
+
+
+def _process_file_worker(
+    file_path: str, config: BarcodeConfig, ff_loc: str, count: int, total: int
+) -> Tuple[Optional[List[ChannelResults]], float]:
+    """Process a file in a pool worker and report how long it took."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    set_verbose(config.output.verbose)
+
+    start_time = time.time()
+    results, _ = _process_file_cached(file_path, config, ff_loc, count, total)
+    return results, time.time() - start_time
+
+
+def _merge_fail_log(part_loc: str, ff_loc: str) -> None:
+    """Append a worker's failure log to the main failed files log."""
+    if not os.path.exists(part_loc):
+        return
+    with open(part_loc, "r", encoding="utf-8") as part_file:
+        failures = part_file.read()
+    with open(ff_loc, "a", encoding="utf-8") as log_file:
+        log_file.write(failures)
 
 
 def process_multiple_files(
@@ -174,35 +372,45 @@ def process_multiple_files(
     config: BarcodeConfig,
     ff_loc: str,
     timer: Timer,
+    journal: Optional[ResultsJournal] = None,
+    writer: Optional[ResultsWriter] = None,
 ) -> List[ChannelResults]:
     """
     Process a list of files and return collected results.
+
+    With a journal, each file's results are recorded in it as soon as the
+    file finishes instead of being collected, and the returned list is empty.
+    With a writer, each file's results are also appended to its CSV then.
+
+    With `config.analysis.workers` above 1 the files are processed in a pool
+    of worker processes. Results, failure log entries and timing lines are
+    still collected in file order, so the output matches a serial run.
+    Unless `config.analysis.use_cache` is off, files that are unchanged since
+    an earlier run with the same settings take their results from the cache.
     """
+    if config.analysis.workers > 1 and len(files_to_process) > 1:
+        return _process_files_parallel(
+            files_to_process, config, ff_loc, timer, journal, writer
+        )
+
     all_results = []
     total_files = len(files_to_process)
     file_itr = 1
 
     for file_path in files_to_process:
-
-        try:
-            results, file_itr = process_single_file(
-                file_path, config, ff_loc, file_itr, total_files
-            )
-        except TypeError as e:
-            if "BARCODE" in str(e):
-                continue
-            print(e)
-            continue
-        except Exception as e:
-            with open(ff_loc, "a", encoding="utf-8") as log_file:
-                log_file.write(f"File: {file_path}, Exception: {str(e)}\n")
-            continue
+        results, file_itr = _process_file_cached(
+            file_path, config, ff_loc, file_itr, total_files
+        )
 
         if results == None:
             continue
 
-        for result in results:
-            all_results.append(result)
+        if journal:
+            journal.record(file_path, results)
+        else:
+            all_results.extend(results)
+        if writer:
+            writer.write_all(results)
 
         # Timing and logging
         timer.log_time_since_last_log("Time Elapsed")
@@ -210,6 +418,68 @@ def process_multiple_files(
     return all_results
 
 
+def _process_files_parallel(
+    files_to_process: List[str],
+    config: BarcodeConfig,
+    ff_loc: str,
+    timer: Timer,
+    journal: Optional[ResultsJournal] = None,
+    writer: Optional[ResultsWriter] = None,
+) -> List[ChannelResults]:
+    """Process files across a process pool, collecting results in file order."""
+    all_results = []
+    total_files = len(files_to_process)
+    workers = min(config.analysis.workers, total_files)
+    vprint(f"Processing {total_files} files with {workers} workers")
+
+    # Each file logs failures to its own part file, merged in file order below
+    with tempfile.TemporaryDirectory() as part_dir, ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        part_locs = [
+            os.path.join(part_dir, f"{idx}.txt") for idx in range(total_files)
+        ]
+        futures = [
+            executor.submit(
+                _process_file_worker,
+                file_path,
+                config,
+                part_loc,
+                idx + 1,
+                total_files,
+            )
+            for idx, (file_path, part_loc) in enumerate(
+                zip(files_to_process, part_locs)
+            )
+        ]
+
+        for file_path, part_loc, future in zip(files_to_process, part_locs, futures):
+            try:
+                results, elapsed = future.result()
+            except Exception as e:
+                # The worker itself died, e.g. it ran out of memory
+                results = None
+                with open(part_loc, "a", encoding="utf-8") as log_file:
+                    log_file.write(f"File: {file_path}, Exception: {str(e)}\n")
+
+            _merge_fail_log(part_loc, ff_loc)
+
+            if results == None:
+                continue
+
+            if journal:
+                journal.record(file_path, results)
+            else:
+                all_results.extend(results)
+            if writer:
+                writer.write_all(results)
+
+            # Timing and logging
+            timer.log_elapsed(elapsed, "Time Elapsed")
+
+    return all_results
+
+
 def run_analysis(root_dir: str, config: BarcodeConfig) -> None:
     """Run analysis on a file or directory path."""
 
@@ -225,10 +495,26 @@ def run_analysis(root_dir: str, config: BarcodeConfig) -> None:
 
     base_path, base_name, ff_loc, time_filepath = setup_paths(root_dir, is_single_file)
 
+    # Finished files are journaled so an interrupted run can be resumed, and
+    # their rows streamed to the summary CSV
+    journal = ResultsJournal(journal_path(base_path, base_name, is_single_file))
+    writer = open_summary_writer(base_path, base_name, is_single_file)
+    if config.analysis.resume:
+        completed = journal.resume()
+        if completed:
+            print(f"Resuming: skipping {len(completed)} finished file(s)")
+        files_to_process = [f for f in files_to_process if f not in completed]
+        writer.write_all(journal.read_results())
+    else:
+        journal.reset()
+
     timer = Timer(time_filepath)
     timer.start()
 
-    all_results = process_multiple_files(files_to_process, config, ff_loc, timer)
+    with writer:
+        process_multiple_files(
+            files_to_process, config, ff_loc, timer, journal, writer
+        )
 
     message = "Time Elapsed" + (
         " to Process Files" if is_single_file else " to Process Folder"
@@ -236,6 +522,12 @@ def run_analysis(root_dir: str, config: BarcodeConfig) -> None:
     timer.log_time_since_start(message)
     timer.stop()
 
+    # No summary CSV when every file failed
+    if writer.rows_written == 0:
+        os.remove(writer.output_filepath)
+
+    all_results = journal.read_results()
     save_analysis_results(
         all_results, base_path, base_name, config, ff_loc, is_single_file
     )
+    journal.remove()
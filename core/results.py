@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 
-from core import Metrics, Units
+from core import Metrics, Units, get_data_limits
 
 
 @dataclass
@@ -179,6 +179,11 @@ class ChannelResults(ResultsBase):
     intensity: IntensityResults = field(default_factory=IntensityResults)
     flow: FlowResults = field(default_factory=FlowResults)
 
+    # Per-file config overrides the channel was analyzed with, not written to CSV
+    config_overrides: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Modules that failed on the channel, not written to CSV
+    failed_modules: List[str] = field(default_factory=list)
+
     @classmethod
     def _get_base_headers(cls) -> List[str]:
         return ["Filepath", "Channel", "Flags"]
@@ -215,18 +220,157 @@ class ChannelResults(ResultsBase):
         return data
 
 
+@dataclass
+class ResultsTable:
+    """
+    Columnar results of many channels, for aggregating, sorting and barcodes.
+
+    Row i describes the channel channels[i] of the video filepaths[i], with
+    its dim channel flag in flags[i] and its metric values in metrics[i], in
+    the order of ChannelResults.get_metrics(just_metrics=True). Operations
+    work on whole columns, so they stay fast for hundreds of thousands of rows.
+    """
+
+    filepaths: np.ndarray  # str, (n,)
+    channels: np.ndarray  # int64, (n,)
+    flags: np.ndarray  # int64, (n,)
+    metrics: np.ndarray  # float64, (n, n_metrics)
+
+    @classmethod
+    def empty(cls) -> "ResultsTable":
+        num_metrics = len(ChannelResults.get_metrics(just_metrics=True))
+        return cls(
+            filepaths=np.array([], dtype=str),
+            channels=np.array([], dtype=np.int64),
+            flags=np.array([], dtype=np.int64),
+            metrics=np.empty((0, num_metrics), dtype=np.float64),
+        )
+
+    @classmethod
+    def from_channel_results(cls, results: List[ChannelResults]) -> "ResultsTable":
+        if not results:
+            return cls.empty()
+        return cls(
+            filepaths=np.array([result.filepath for result in results]),
+            channels=np.array([result.channel for result in results], np.int64),
+            flags=np.array(
+                [result.dim_channel_flag for result in results], np.int64
+            ),
+            metrics=np.array(
+                [result.get_data(just_metrics=True) for result in results],
+                dtype=np.float64,
+            ),
+        )
+
+    @classmethod
+    def concat(cls, tables: List["ResultsTable"]) -> "ResultsTable":
+        """Stack the rows of several tables, in order."""
+        if not tables:
+            return cls.empty()
+        return cls(
+            filepaths=np.concatenate([table.filepaths for table in tables]),
+            channels=np.concatenate([table.channels for table in tables]),
+            flags=np.concatenate([table.flags for table in tables]),
+            metrics=np.concatenate([table.metrics for table in tables]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def take(self, index: np.ndarray) -> "ResultsTable":
+        """Rows at an integer index array or boolean mask, in its order."""
+        return ResultsTable(
+            filepaths=self.filepaths[index],
+            channels=self.channels[index],
+            flags=self.flags[index],
+            metrics=self.metrics[index],
+        )
+
+    def filter(self, mask: np.ndarray) -> "ResultsTable":
+        """Rows where the boolean mask is set."""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def column(self, header: str) -> Optional[np.ndarray]:
+        """Values of the column with a summary CSV header, None if unknown."""
+        base_columns = {
+            Metrics.FILEPATH.value: self.filepaths,
+            Metrics.CHANNEL.value: self.channels,
+            Metrics.FLAGS.value: self.flags,
+        }
+        if header in base_columns:
+            return base_columns[header]
+
+        headers = ChannelResults.get_headers(just_metrics=True)
+        if header not in headers:
+            return None
+        return self.metrics[:, headers.index(header)]
+
+    def sort_by(self, header: str) -> "ResultsTable":
+        """
+        Rows in ascending order of a column, ties and missing values last.
+
+        Sorting by an unknown column keeps the order, like
+        sort_channel_results_by_metric.
+        """
+        values = self.column(header)
+        if values is None:
+            return self
+        return self.take(np.argsort(values, kind="stable"))
+
+    def get_data_limits(self) -> List[List[float]]:
+        """Colormap limits of each metric column, see core.get_data_limits."""
+        return get_data_limits(
+            self.metrics,
+            ChannelResults.get_metrics(just_metrics=True),
+            ChannelResults.get_units(just_metrics=True),
+        )
+
+    def get_rows(self) -> List[list]:
+        """Rows as ChannelResults.get_data(just_metrics=False) gives them."""
+        return [
+            [filepath, channel, flag, *values]
+            for filepath, channel, flag, values in zip(
+                self.filepaths.tolist(),
+                self.channels.tolist(),
+                self.flags.tolist(),
+                self.metrics.tolist(),
+            )
+        ]
+
+    def to_channel_results(self) -> List[ChannelResults]:
+        """
+        Rebuild ChannelResults from the rows.
+
+        Only what the summary CSV holds is kept, so intensity flags and config
+        overrides are left at their defaults.
+        """
+        # Metric columns where the intensity and flow results start
+        intensity_start = len(BinarizationResults.get_metrics())
+        flow_start = intensity_start + len(IntensityResults.get_metrics())
+
+        results = []
+        for filepath, channel, flag, *values in self.get_rows():
+            results.append(
+                ChannelResults(
+                    filepath=filepath,
+                    channel=channel,
+                    dim_channel_flag=flag,
+                    binarization=BinarizationResults(*values[:intensity_start]),
+                    intensity=IntensityResults(*values[intensity_start:flow_start]),
+                    flow=FlowResults(*values[flow_start:]),
+                )
+            )
+        return results
+
+
 def sort_channel_results_by_metric(
     results: List[ChannelResults], sort_metric: str
 ) -> None:
-    def get_metric_value(result: ChannelResults, metric_name: str) -> float:
-        """Get metric value by header name."""
-        headers = ChannelResults.get_headers(just_metrics=False)
-        data = result.get_data(just_metrics=False)
-
-        try:
-            idx = headers.index(metric_name)
-            return data[idx]
-        except (ValueError, IndexError):
-            return 0.0  # Default for sorting if metric not found
-
-    results.sort(key=lambda r: get_metric_value(r, sort_metric))
+    """Sort results in place by the column with a summary CSV header."""
+    table = ResultsTable.from_channel_results(results)
+    values = table.column(sort_metric)
+    if values is None:
+        return  # Keep the order if metric not found
+
+    order = np.argsort(values, kind="stable")
+    results[:] = [results[i] for i in order]
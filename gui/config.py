@@ -105,11 +105,21 @@ class AnalysisConfigGUI:
     enable_binarization: tk.BooleanVar = field(init=False)
     enable_optical_flow: tk.BooleanVar = field(init=False)
     enable_intensity_distribution: tk.BooleanVar = field(init=False)
+    workers: tk.IntVar = field(init=False)
+    use_cache: tk.BooleanVar = field(init=False)
+    cache_dir: tk.StringVar = field(init=False)
+    cache_size_mb: tk.IntVar = field(init=False)
+    resume: tk.BooleanVar = field(init=False)
 
     def __post_init__(self):
         self.enable_binarization = tk.BooleanVar(value=self._core_config.enable_binarization)
         self.enable_optical_flow = tk.BooleanVar(value=self._core_config.enable_optical_flow)
         self.enable_intensity_distribution = tk.BooleanVar(value=self._core_config.enable_intensity_distribution)
+        self.workers = tk.IntVar(value=self._core_config.workers)
+        self.use_cache = tk.BooleanVar(value=self._core_config.use_cache)
+        self.cache_dir = tk.StringVar(value=self._core_config.cache_dir)
+        self.cache_size_mb = tk.IntVar(value=self._core_config.cache_size_mb)
+        self.resume = tk.BooleanVar(value=self._core_config.resume)
 
     @property
     def config(self) -> AnalysisConfig:
@@ -118,6 +128,11 @@ class AnalysisConfigGUI:
             enable_binarization=self.enable_binarization.get(),
             enable_optical_flow=self.enable_optical_flow.get(),
             enable_intensity_distribution=self.enable_intensity_distribution.get(),
+            workers=self.workers.get(),
+            use_cache=self.use_cache.get(),
+            cache_dir=self.cache_dir.get(),
+            cache_size_mb=self.cache_size_mb.get(),
+            resume=self.resume.get(),
         )
 
     def update_gui(self, new_config: AnalysisConfig):
@@ -126,6 +141,11 @@ class AnalysisConfigGUI:
         self.enable_binarization.set(new_config.enable_binarization)
         self.enable_optical_flow.set(new_config.enable_optical_flow)
         self.enable_intensity_distribution.set(new_config.enable_intensity_distribution)
+        self.workers.set(new_config.workers)
+        self.use_cache.set(new_config.use_cache)
+        self.cache_dir.set(new_config.cache_dir)
+        self.cache_size_mb.set(new_config.cache_size_mb)
+        self.resume.set(new_config.resume)
 
 @dataclass
 class OutputConfigGUI:
@@ -172,6 +192,8 @@ class BinarizationConfigGUI:
     frame_stop_percent: tk.DoubleVar = field(init=False)
     binning_number: tk.IntVar = field(init=False)
     area_size: tk.IntVar = field(init=False)
+    batch_size: tk.IntVar = field(init=False)
+    threads: tk.IntVar = field(init=False)
 
     def __post_init__(self):
         self.threshold_offset = tk.DoubleVar(value=self._core_config.threshold_offset)
@@ -180,6 +202,8 @@ class BinarizationConfigGUI:
         self.frame_stop_percent = tk.DoubleVar(value=self._core_config.frame_stop_percent)
         self.binning_number = tk.IntVar(value=self._core_config.binning_number)
         self.area_size = tk.IntVar(value=self._core_config.area_size)
+        self.batch_size = tk.IntVar(value=self._core_config.batch_size)
+        self.threads = tk.IntVar(value=self._core_config.threads)
 
     @property
     def config(self) -> BinarizationConfig:
@@ -191,6 +215,8 @@ class BinarizationConfigGUI:
             frame_stop_percent=self.frame_stop_percent.get(),
             binning_number=self.binning_number.get(),
             area_size=self.area_size.get(),
+            batch_size=self.batch_size.get(),
+            threads=self.threads.get(),
         )
 
     def update_gui(self, new_config: BinarizationConfig):
@@ -202,6 +228,8 @@ class BinarizationConfigGUI:
         self.frame_stop_percent.set(new_config.frame_stop_percent)
         self.binning_number.set(new_config.binning_number)
         self.area_size.set(new_config.area_size)
+        self.batch_size.set(new_config.batch_size)
+        self.threads.set(new_config.threads)
 
 @dataclass
 class OpticalFlowConfigGUI:
@@ -214,6 +242,10 @@ class OpticalFlowConfigGUI:
     nm_pixel_ratio: tk.DoubleVar = field(init=False)
     frame_interval_s: tk.IntVar = field(init=False)
     binning_number: tk.IntVar = field(init=False)
+    bin_frames: tk.BooleanVar = field(init=False)
+    engine: tk.StringVar = field(init=False)
+    threads: tk.IntVar = field(init=False)
+    warm_start: tk.BooleanVar = field(init=False)
 
     def __post_init__(self):
         self.frame_step = tk.IntVar(value=self._core_config.frame_step)
@@ -222,6 +254,10 @@ class OpticalFlowConfigGUI:
         self.nm_pixel_ratio = tk.DoubleVar(value=self._core_config.nm_pixel_ratio)
         self.frame_interval_s = tk.IntVar(value=self._core_config.frame_interval_s)
         self.binning_number = tk.IntVar(value=self._core_config.binning_number)
+        self.bin_frames = tk.BooleanVar(value=self._core_config.bin_frames)
+        self.engine = tk.StringVar(value=self._core_config.engine)
+        self.threads = tk.IntVar(value=self._core_config.threads)
+        self.warm_start = tk.BooleanVar(value=self._core_config.warm_start)
 
     @property
     def config(self) -> OpticalFlowConfig:
@@ -233,6 +269,10 @@ class OpticalFlowConfigGUI:
             nm_pixel_ratio=self.nm_pixel_ratio.get(),
             frame_interval_s=self.frame_interval_s.get(),
             binning_number=self.binning_number.get(),
+            bin_frames=self.bin_frames.get(),
+            engine=self.engine.get(),
+            threads=self.threads.get(),
+            warm_start=self.warm_start.get(),
         )
 
     def update_gui(self, new_config: OpticalFlowConfig):
@@ -244,6 +284,10 @@ class OpticalFlowConfigGUI:
         self.nm_pixel_ratio.set(new_config.nm_pixel_ratio)
         self.frame_interval_s.set(new_config.frame_interval_s)
         self.binning_number.set(new_config.binning_number)
+        self.bin_frames.set(new_config.bin_frames)
+        self.engine.set(new_config.engine)
+        self.threads.set(new_config.threads)
+        self.warm_start.set(new_config.warm_start)
 
 @dataclass
 class IntensityDistributionConfigGUI:
@@ -253,11 +297,19 @@ class IntensityDistributionConfigGUI:
     first_frame: tk.IntVar = field(init=False)
     last_frame: tk.IntVar = field(init=False)
     frames_evaluation_percent: tk.DoubleVar = field(init=False)
+    timecourse_step: tk.IntVar = field(init=False)
+    approximate: tk.BooleanVar = field(init=False)
+    approximate_pixels: tk.IntVar = field(init=False)
+    approximate_tolerance: tk.DoubleVar = field(init=False)
 
     def __post_init__(self):
         self.first_frame = tk.IntVar(value=self._core_config.first_frame)
         self.last_frame = tk.IntVar(value=self._core_config.last_frame)
         self.frames_evaluation_percent = tk.DoubleVar(value=self._core_config.frames_evaluation_percent)
+        self.timecourse_step = tk.IntVar(value=self._core_config.timecourse_step)
+        self.approximate = tk.BooleanVar(value=self._core_config.approximate)
+        self.approximate_pixels = tk.IntVar(value=self._core_config.approximate_pixels)
+        self.approximate_tolerance = tk.DoubleVar(value=self._core_config.approximate_tolerance)
 
     @property
     def config(self) -> IntensityDistributionConfig:
@@ -266,6 +318,10 @@ class IntensityDistributionConfigGUI:
             first_frame=self.first_frame.get(),
             last_frame=self.last_frame.get(),
             frames_evaluation_percent=self.frames_evaluation_percent.get(),
+            timecourse_step=self.timecourse_step.get(),
+            approximate=self.approximate.get(),
+            approximate_pixels=self.approximate_pixels.get(),
+            approximate_tolerance=self.approximate_tolerance.get(),
         )
 
     def update_gui(self, new_config: IntensityDistributionConfig):
@@ -274,6 +330,10 @@ class IntensityDistributionConfigGUI:
         self.first_frame.set(new_config.first_frame)
         self.last_frame.set(new_config.last_frame)
         self.frames_evaluation_percent.set(new_config.frames_evaluation_percent)
+        self.timecourse_step.set(new_config.timecourse_step)
+        self.approximate.set(new_config.approximate)
+        self.approximate_pixels.set(new_config.approximate_pixels)
+        self.approximate_tolerance.set(new_config.approximate_tolerance)
 
 @dataclass
 class PreviewConfigGUI:
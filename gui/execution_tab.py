@@ -115,6 +115,15 @@ def create_execution_frame(parent, config: BarcodeConfigGUI, input_config: Input
 
     cc.selected_channel.trace_add("write", on_channel_selection_changed)
 
+    # Parallel workers
+    tk.Label(frame, text="Parallel Workers (files):").grid(
+        row=row_idx, column=0, sticky="w", padx=5, pady=5
+    )
+    tk.Spinbox(frame, from_=1, to=256, textvariable=ca.workers, width=5).grid(
+        row=row_idx, column=1, sticky="w", padx=5, pady=2
+    )
+    row_idx += 1
+
     # Analysis modules
     _create_analysis_section(
         frame,
@@ -192,6 +201,24 @@ def create_execution_frame(parent, config: BarcodeConfigGUI, input_config: Input
     )
     row_idx += 2
 
+    _create_option_section(
+        frame,
+        row_idx,
+        "Use Result Cache",
+        ca.use_cache,
+        "Reuse results of files unchanged since an earlier run with the same settings",
+    )
+    row_idx += 2
+
+    _create_option_section(
+        frame,
+        row_idx,
+        "Resume Interrupted Run",
+        ca.resume,
+        "Skip files already finished by an interrupted run of the same folder",
+    )
+    row_idx += 2
+
     # Configuration file
     tk.Label(frame, text="Configuration YAML File:").grid(
         row=row_idx, column=0, sticky="w", padx=5, pady=2
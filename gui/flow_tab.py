@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
 
+from analysis.flow import FLOW_ENGINES
 from gui.config import BarcodeConfigGUI
 
 
@@ -13,6 +14,19 @@ def create_flow_frame(parent, config: BarcodeConfigGUI):
 
     row_f = 0
 
+    tk.Label(frame, text="Flow Engine:").grid(
+        row=row_f, column=0, sticky="w", padx=5, pady=5
+    )
+    engine_combo = ttk.Combobox(
+        frame,
+        values=list(FLOW_ENGINES),
+        textvariable=co.engine,
+        state="readonly",
+        width=10,
+    )
+    engine_combo.grid(row=row_f, column=1, padx=5, pady=5)
+    row_f += 1
+
     tk.Label(frame, text="Frame Step (Minimum: 1 Frame):").grid(
         row=row_f, column=0, sticky="w", padx=5, pady=5
     )
@@ -66,5 +80,17 @@ def create_flow_frame(parent, config: BarcodeConfigGUI):
         width=7,
     )
     frame_interval_spin.grid(row=row_f, column=1, padx=5, pady=5)
+    row_f += 1
+
+    tk.Label(frame, text="Binning (Frames Binned Before Flow):").grid(
+        row=row_f, column=0, sticky="w", padx=5, pady=5
+    )
+    binning_spin = ttk.Spinbox(
+        frame, values=(2, 4, 8), textvariable=co.binning_number, width=7
+    )
+    binning_spin.grid(row=row_f, column=1, padx=5, pady=5)
+    tk.Checkbutton(frame, text="Bin Frames", variable=co.bin_frames).grid(
+        row=row_f, column=2, sticky="w", padx=5, pady=5
+    )
 
     return frame
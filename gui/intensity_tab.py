@@ -44,5 +44,19 @@ def create_intensity_frame(parent, config: BarcodeConfigGUI):
         width=7,
     )
     pf_eval_spin.grid(row=row_c, column=1, padx=5, pady=5)
+    row_c += 1
+
+    tk.Label(frame, text="Timecourse Step (Select 0 to disable):").grid(
+        row=row_c, column=0, sticky="w", padx=5, pady=5
+    )
+    timecourse_spin = ttk.Spinbox(
+        frame, from_=0, to=10**3, increment=1, textvariable=ci.timecourse_step, width=7
+    )
+    timecourse_spin.grid(row=row_c, column=1, padx=5, pady=5)
+    row_c += 1
+
+    tk.Checkbutton(
+        frame, text="Approximate Statistics", variable=ci.approximate
+    ).grid(row=row_c, column=0, sticky="w", padx=5, pady=5)
 
     return frame
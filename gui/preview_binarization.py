@@ -3,52 +3,26 @@ from tkinter import filedialog
 
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
-import numpy as np
-import nd2
 
 from utils.analysis import binarize,group_avg
+from utils.reader import open_video
 
-try:
-    import tifffile
-except ImportError:
-    tifffile = None
 
-
-def load_first_frame(file_path, channel):
+def load_first_frame(file_path, channel=0):
     ext = file_path.lower().split(".")[-1]
-    if ext in ["tif", "tiff"] and tifffile:
-        img = tifffile.imread(file_path)
-        if img.ndim == 3:
-            return img[0]
-        if img.ndim == 4:
-            total_channels = img.shape[3]
-            while channel < 0:
-                channel = total_channels + channel
-            # Clamp to valid range
-            if channel >= total_channels:
-                channel = total_channels - 1
-            return img[0, :, :, channel]
-        return img
-    elif ext == "nd2":
-        with nd2.ND2File(file_path) as ndfile:
-            file = ndfile.asarray()
-            if len(ndfile.sizes) not in [3, 4] or "T" not in ndfile.sizes or "Z" in ndfile.sizes:
-                raise ValueError(
-                    "Only TIFF and ND2 are supported in this demo, and required libraries must be installed."
-                )
-            img = np.swapaxes(np.swapaxes(file, 1, 2), 2, 3)
-            if len(ndfile.sizes) == 3:
-                return img[0]
-            total_channels = img.shape[3]
-            while channel < 0:
-                channel = total_channels + channel
-            # Clamp to valid range
-            if channel >= total_channels:
-                channel = total_channels - 1
-            return img[0, :, :, channel]
-    raise ValueError(
-        "Only TIFF and ND2 are supported in this demo, and required libraries must be installed."
-    )
+    if ext not in ["tif", "tiff", "nd2"]:
+        raise ValueError(
+            "Only TIFF and ND2 are supported in this demo, and required libraries must be installed."
+        )
+    # Only the first frame of the selected channel is decoded
+    with open_video(file_path) as video:
+        total_channels = video.shape[3]
+        while channel < 0:
+            channel = total_channels + channel
+        # Clamp to valid range
+        if channel >= total_channels:
+            channel = total_channels - 1
+        return video[0, :, :, channel]
 
 
 def main():
@@ -81,7 +55,7 @@ def main():
 
     def update(val):
         offset = s_offset.val
-        bin_img = binarize(image, offset)
+        binarize(image, offset, out=bin_img)
         im.set_data(bin_img)
         ax.set_title(f"Offset: {offset:.2f}")
         fig.canvas.draw_idle()
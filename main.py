@@ -1,3 +1,4 @@
+import multiprocessing
 import threading
 import traceback
 
@@ -183,4 +184,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for file-level worker processes in frozen app builds
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,30 @@
+import numpy as np
+import yaml
+
+from core import BarcodeConfig
+from core.config import FILE_OVERRIDES_KEY
+
+
+def test_settings_round_trip_with_numpy_overrides(tmp_path):
+    # ND2 metadata is computed with NumPy, e.g. the mean frame interval
+    overrides = {
+        "video.nd2": {
+            "optical_flow": {
+                "frame_interval_s": np.float64(0.5),
+                "nm_pixel_ratio": np.float32(65.0),
+            }
+        }
+    }
+    config = BarcodeConfig()
+    settings_path = str(tmp_path / "settings.yaml")
+    config.save_to_yaml(settings_path, overrides)
+
+    assert BarcodeConfig.load_from_yaml(settings_path) == config
+
+    with open(settings_path, "r") as f:
+        saved_overrides = yaml.safe_load(f)[FILE_OVERRIDES_KEY]
+    assert saved_overrides == {
+        "video.nd2": {
+            "optical_flow": {"frame_interval_s": 0.5, "nm_pixel_ratio": 65.0}
+        }
+    }
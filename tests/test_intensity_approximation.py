@@ -0,0 +1,60 @@
+import numpy as np
+
+from analysis.intensity_distribution import IntensityAnalyzer
+from core import IntensityDistributionConfig, OutputConfig
+
+
+def fluorescence_frames(dtype, num_frames=10, size=256):
+    """Gaussian background with a long tail of bright pixels."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(num_frames):
+        frame = rng.normal(300, 15, (size, size))
+        bright = rng.random((size, size)) < 0.2
+        frame[bright] += rng.exponential(400, bright.sum())
+        frames.append(frame.astype(dtype))
+    return frames
+
+
+def analyze(frames, approximate):
+    config = IntensityDistributionConfig(
+        frames_evaluation_percent=0.2,
+        approximate=approximate,
+        approximate_pixels=8192,
+    )
+    analyzer = IntensityAnalyzer(len(frames), "", config, OutputConfig())
+    for frame_idx in analyzer.frames:
+        analyzer.consume(frame_idx, frames[frame_idx])
+    _, results = analyzer.finalize()
+    return analyzer, results
+
+
+def test_approximated_metrics_are_within_their_bootstrap_errors():
+    frames = fluorescence_frames(np.float32)
+
+    approx, _ = analyze(frames, approximate=True)
+    exact, _ = analyze(frames, approximate=False)
+
+    # Every frame was estimated from the sample rather than falling back
+    assert sorted(approx.approximation_errors) == approx.frames
+    assert not approx.exact_frames
+
+    for frame_idx, errors in approx.approximation_errors.items():
+        assert np.all(errors <= approx.int_config.approximate_tolerance)
+
+        exact_metrics = exact._frame_metrics[frame_idx]
+        kurt, median_skew, mode_skew = exact_metrics
+        # Errors are scaled to each metric, see bootstrap_intensity_stats
+        scales = [kurt + 3, max(1, abs(median_skew)), max(1, abs(mode_skew))]
+        deviation = np.abs(np.subtract(approx._frame_metrics[frame_idx], exact_metrics))
+        assert np.all(deviation <= 3 * errors * scales)
+
+
+def test_uint16_frames_skip_approximation():
+    frames = fluorescence_frames(np.uint16)
+
+    analyzer, approx_results = analyze(frames, approximate=True)
+    _, exact_results = analyze(frames, approximate=False)
+
+    assert not analyzer.approximation_errors
+    assert approx_results == exact_results
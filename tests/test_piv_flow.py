@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from scipy import ndimage
+
+from analysis.flow import piv_flow, piv_outliers
+
+
+def texture(size=300):
+    """Smooth random texture, like the speckle PIV tracks."""
+    rng = np.random.default_rng(0)
+    return ndimage.gaussian_filter(rng.random((size, size)), 2).astype(np.float32)
+
+
+@pytest.mark.parametrize("dy, dx", [(3, 1), (6, -4), (1.5, -2.25)])
+def test_piv_recovers_a_rigid_shift(dy, dx):
+    base = texture()
+    prev_frame = base[20:276, 20:276]
+    next_frame = ndimage.shift(base, (dy, dx), order=3)[20:276, 20:276]
+
+    flow = piv_flow(prev_frame, next_frame, window_size=32, downsample_factor=8)
+
+    assert flow.shape == (32, 32, 2)
+    # Cells whose search would leave the frame have no vector
+    assert np.isnan(flow[0]).all() and np.isnan(flow[:, -1]).all()
+    measured = ~np.isnan(flow[..., 0])
+    assert measured.sum() >= 0.5 * measured.size
+    error = np.hypot(flow[..., 0] - dx, flow[..., 1] - dy)[measured]
+    assert error.max() < 0.25
+
+
+def test_piv_outliers_flags_only_the_stray_vector():
+    flow = np.tile(np.float32([3, 1]), (8, 8, 1))
+    flow += np.random.default_rng(0).normal(0, 0.05, flow.shape).astype(np.float32)
+    flow[0] = np.nan
+    flow[4, 4] = (-12, 9)
+
+    outliers = piv_outliers(flow)
+
+    assert outliers[4, 4]
+    assert outliers.sum() == 1
@@ -1,8 +1,9 @@
-from typing import List
+from dataclasses import dataclass, fields
+from typing import List, Optional, Tuple
 
 import numpy as np
+from scipy import ndimage
 from scipy.stats import mode
-from skimage.measure import label, regionprops
 
 def inv(arr: np.ndarray) -> np.ndarray:
     """Invert a binary array."""
@@ -19,17 +20,77 @@ def group_avg(arr: np.ndarray, N: int) -> np.ndarray:
     return result
 
 
-def binarize(frame: np.ndarray, offset_threshold: float) -> np.ndarray:
-    """Binarize data based on an offset threshold."""
+def binarize(
+    frame: np.ndarray, offset_threshold: float, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Binarize data based on an offset threshold, clearing isolated single pixels.
+
+    Returns a boolean array, written into `out` (a boolean array of the frame's
+    shape) if given.
+    """
     avg_intensity = np.mean(frame)
     threshold = avg_intensity * (1 + offset_threshold)
-    new_frame = np.where(frame < threshold, 0, 1)
-    labeled_frame = label(new_frame, connectivity=2)
-    regions = regionprops(labeled_frame)
-    for region in regions:
-        if region.area == 1:
-            new_frame[labeled_frame == region.label] = 0
-    return new_frame
+    out = np.less(frame, threshold, out=out)
+    np.logical_not(out, out=out)
+
+    # Clear every component of area 1 with a single label lookup
+    labeled_frame, num_labels = ndimage.label(
+        out, structure=ndimage.generate_binary_structure(2, 2)
+    )
+    keep = np.bincount(labeled_frame.ravel(), minlength=num_labels + 1) != 1
+    keep[0] = False
+    np.logical_and(out, keep[labeled_frame], out=out)
+    return out
+
+
+def group_avg_stack(stack: np.ndarray, N: int) -> np.ndarray:
+    """Downsample a (K, H, W) stack by averaging each frame over N x N blocks."""
+    K, H, W = stack.shape
+    h, w = H // N, W // N
+    blocks = stack[:, : h * N, : w * N].reshape(K, h, N, w, N)
+    return blocks.mean(axis=(2, 4))
+
+
+def plane_structure(connectivity: int) -> np.ndarray:
+    """3D structuring element connecting pixels within a frame but not across frames."""
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = ndimage.generate_binary_structure(2, connectivity)
+    return structure
+
+
+def binarize_stack(
+    stack: np.ndarray, offset_threshold: float, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Binarize a (K, H, W) stack, thresholding each frame against its own mean.
+
+    Equivalent to calling `binarize` on every frame, but all frames are
+    thresholded in one broadcast and labeled in one call.
+    """
+    avg_intensity = stack.reshape(len(stack), -1).mean(axis=1)
+    threshold = avg_intensity * (1 + offset_threshold)
+    out = np.less(stack, threshold[:, None, None], out=out)
+    np.logical_not(out, out=out)
+
+    labeled_stack, num_labels = ndimage.label(out, structure=plane_structure(2))
+    keep = np.bincount(labeled_stack.ravel(), minlength=num_labels + 1) != 1
+    keep[0] = False
+    np.logical_and(out, keep[labeled_stack], out=out)
+    return out
+
+
+def remove_small_objects_stack(stack: np.ndarray, min_size: int) -> np.ndarray:
+    """
+    Remove components smaller than min_size from each frame of a boolean stack.
+
+    Matches `skimage.morphology.remove_small_objects` (connectivity 1) applied
+    frame by frame.
+    """
+    labeled_stack, num_labels = ndimage.label(stack, structure=plane_structure(1))
+    keep = np.bincount(labeled_stack.ravel(), minlength=num_labels + 1) >= min_size
+    keep[0] = False
+    return keep[labeled_stack]
 
 
 def top_ten_average(values: List[float]) -> float:
@@ -46,6 +107,30 @@ def check_channel_dim(image: np.ndarray) -> bool:
     return 2 * np.exp(-1) * mean_intensity <= min_intensity
 
 
+def check_frames_dim(image: np.ndarray) -> bool:
+    """
+    Check if a (T, Y, X) channel is dim, reading one frame at a time.
+
+    Gives the answer of check_channel_dim on the whole channel, but stops
+    reading once the frames seen so far rule dimness out. Every unread frame's
+    mean is at least the channel minimum, which bounds how low the channel mean
+    can still go, and so how high the minimum must be for the channel to be dim.
+    """
+    num_frames = len(image)
+    ratio = 2 * np.exp(-1)
+    min_intensity = np.inf
+    mean_sum = 0.0
+    for t in range(num_frames):
+        frame = image[t]
+        min_intensity = min(min_intensity, np.min(frame))
+        mean_sum += np.mean(frame, dtype=np.float64)
+        unread = (num_frames - t - 1) / num_frames
+        dim_floor = ratio * mean_sum / num_frames / (1 - ratio * unread)
+        if min_intensity < dim_floor:
+            return False
+    return ratio * mean_sum / num_frames <= min_intensity
+
+
 def calc_mode(frame: np.ndarray) -> float:
     """Calculate the mode of the pixel intensities in a frame."""
     mode_result = mode(frame.flatten(), keepdims=False)
@@ -72,3 +157,279 @@ def calc_median_skewness(frame: np.ndarray) -> float:
     median_intensity = np.median(frame)
     stdev_intensity = np.std(frame)
     return 3 * (mean_intensity - median_intensity) / stdev_intensity
+
+
+# Integer frames whose intensity statistics are computed from a histogram
+HISTOGRAM_DTYPES = (np.uint8, np.uint16)
+
+# Pixels stacked into one float32 block for vectorized moments, bounds memory
+INTENSITY_CHUNK_PIXELS = 2**22
+
+
+@dataclass
+class IntensityStats:
+    """Summary statistics of the pixel intensities in a frame."""
+
+    mean: float
+    std: float
+    median: float
+    mode: float
+    max: float
+    kurtosis: float  # Fisher (excess) kurtosis, as scipy.stats.kurtosis
+
+    @property
+    def median_skewness(self) -> float:
+        """Skewness based on median, as calc_median_skewness."""
+        return 3 * (self.mean - self.median) / self.std
+
+    @property
+    def mode_skewness(self) -> float:
+        """Skewness based on mode, as calc_mode_skewness."""
+        return (self.mean - self.mode) / self.std
+
+
+def intensity_histogram(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intensity values present in a uint8/uint16 frame and their pixel counts.
+
+    Same as np.unique(frame, return_counts=True), but counted in one pass
+    with np.bincount instead of sorting the frame.
+    """
+    counts = np.bincount(frame.ravel())
+    values = np.flatnonzero(counts)
+    return values, counts[values]
+
+
+def histogram_intensity_stats(
+    values: np.ndarray, counts: np.ndarray
+) -> IntensityStats:
+    """
+    Intensity statistics of a frame from its (values, counts) histogram.
+
+    Each statistic takes one pass over the histogram bins instead of the
+    frame's pixels, and matches what calc_mode, np.median and
+    scipy.stats.kurtosis give on the frame itself.
+    """
+    num_pixels = counts.sum()
+    mean = np.float64(np.dot(values, counts)) / num_pixels
+
+    deviations = values - mean
+    m2 = np.dot(counts, deviations**2) / num_pixels
+    m4 = np.dot(counts, deviations**4) / num_pixels
+
+    # Middle pixel(s) in sorted order, averaged for an even number of pixels
+    cumulative = np.cumsum(counts)
+    middle = np.searchsorted(
+        cumulative, [(num_pixels - 1) // 2, num_pixels // 2], side="right"
+    )
+    median = np.mean(values[middle])
+
+    # Like scipy, kurtosis is undefined for a (numerically) constant frame
+    if m2 <= (np.finfo(np.float64).eps * mean) ** 2:
+        kurt = np.nan
+    else:
+        kurt = m4 / m2**2 - 3
+
+    return IntensityStats(
+        mean=mean,
+        std=np.sqrt(m2),
+        median=median,
+        mode=values[np.argmax(counts)],  # Smallest value on ties, as scipy
+        max=values[-1],
+        kurtosis=kurt,
+    )
+
+
+def stack_intensity_stats(stack: np.ndarray) -> IntensityStats:
+    """
+    Intensity statistics of every frame of an (N, H, W) or (N, H*W) stack.
+
+    Frames are flattened into (n, H*W) float32 blocks of about
+    INTENSITY_CHUNK_PIXELS, and each statistic is computed along axis 1 for
+    all frames of a block at once, accumulating in float64. A block holds at
+    least one frame, so besides the stack itself this takes about two float32
+    copies of max(INTENSITY_CHUNK_PIXELS, H*W) pixels, whatever N is.
+    The mode is each frame's binned_mode, as for approximated statistics. The
+    fields of the returned IntensityStats are arrays of length N.
+    """
+    frames_per_block = max(1, INTENSITY_CHUNK_PIXELS // max(1, np.size(stack[0])))
+    blocks = [
+        block_intensity_stats(stack[start : start + frames_per_block])
+        for start in range(0, len(stack), frames_per_block)
+    ]
+    return IntensityStats(
+        **{
+            field.name: np.concatenate([getattr(stats, field.name) for stats in blocks])
+            for field in fields(IntensityStats)
+        }
+    )
+
+
+def block_intensity_stats(stack: np.ndarray) -> IntensityStats:
+    """Intensity statistics of the frames of one stack_intensity_stats block."""
+    block = np.array(stack, dtype=np.float32).reshape(len(stack), -1)
+
+    mean = block.mean(axis=1, dtype=np.float64)
+    deviations = block - mean.astype(np.float32)[:, None]
+    deviations *= deviations
+    m2 = deviations.mean(axis=1, dtype=np.float64)
+    deviations *= deviations
+    m4 = deviations.mean(axis=1, dtype=np.float64)
+
+    # Like scipy, kurtosis is undefined for a (numerically) constant frame
+    constant = m2 <= (np.finfo(np.float64).eps * mean) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kurt = np.where(constant, np.nan, m4 / m2**2 - 3)
+
+    # One sort per frame gives the median and max
+    block.sort(axis=1)
+    num_pixels = block.shape[1]
+    middle = [(num_pixels - 1) // 2, num_pixels // 2]
+
+    return IntensityStats(
+        mean=mean,
+        std=np.sqrt(m2),
+        median=block[:, middle].mean(axis=1),
+        mode=np.array([binned_mode(row) for row in block]),
+        max=block[:, -1],
+        kurtosis=kurt,
+    )
+
+
+def mode_bins(values: np.ndarray) -> Tuple[float, float, float, np.ndarray]:
+    """
+    Histogram bins for binned_mode: (low, width, step, bin of each value).
+
+    Bins follow the Freedman-Diaconis rule and start at the lowest value.
+    Integer values (step 1) get whole-number widths, or bins would alternate
+    in counts. The width is 0 when over half the values are equal.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    low = values.min()
+    q1, q3 = np.percentile(values, [25, 75])
+    width = 2 * (q3 - q1) * len(values) ** (-1 / 3)
+
+    step = 1.0 if np.all(values == np.round(values)) else 0.0
+    if step and width > 0:
+        width = max(1.0, np.round(width))
+    if width <= 0:
+        return low, 0.0, step, np.zeros(len(values), dtype=np.int64)
+    return low, width, step, ((values - low) // width).astype(np.int64)
+
+
+def histogram_peak(
+    counts: np.ndarray, low: float, width: float, step: float, high: float
+) -> float:
+    """
+    Intensity at the peak of a histogram of mode_bins bins.
+
+    The peak is refined with a parabola through the fullest bin and its
+    neighbors. A peak in the top bin (a saturated frame) gives `high`.
+    """
+    peak = int(np.argmax(counts))
+    if peak == len(counts) - 1:
+        return high
+
+    offset = 0.0
+    if peak > 0:
+        before, at, after = counts[peak - 1 : peak + 2].astype(np.float64)
+        curvature = before - 2 * at + after
+        if curvature < 0:
+            offset = 0.5 * (before - after) / curvature
+
+    # Bin centre, the middle of the whole numbers a bin holds for integers
+    return low + (peak + offset) * width + (width - step) / 2
+
+
+def binned_mode(values: np.ndarray) -> float:
+    """
+    Mode of a frame or pixel sample, as the peak of its histogram.
+
+    Unlike the most common single value, this holds up on continuous
+    intensities, where nearly every value is unique, and on a sample of a
+    broad distribution. When over half the values are equal, that value.
+    """
+    low, width, step, bins = mode_bins(values)
+    if width == 0:
+        return sorted_mode(np.sort(values))
+    return histogram_peak(np.bincount(bins), low, width, step, np.max(values))
+
+
+def bootstrap_intensity_stats(
+    sample: np.ndarray, rng: np.random.Generator, resamples: int = 10
+) -> Tuple[IntensityStats, np.ndarray]:
+    """
+    Intensity statistics of a pixel sample, with bootstrap error estimates.
+
+    The mode is the sample's binned_mode, as stack_intensity_stats gives for
+    whole frames. The errors are the standard
+    deviations of the kurtosis, median skewness and mode skewness over
+    `resamples` resamples, in that order, each scaled to its metric: the
+    kurtosis error is relative to the (non-excess) kurtosis, and the
+    skewness errors are relative to the skewness, or absolute for skewness
+    within +/-1.
+
+    Each resample is kept as how many times it drew each pixel, so all
+    resamples share one sort and one binning of the sample and each
+    statistic is a weighted sum.
+    """
+    values = np.sort(np.asarray(sample, dtype=np.float64))
+    stats = stack_intensity_stats(values[None])
+    low, width, step, bins = mode_bins(values)
+    num_values = len(values)
+    draws = rng.integers(0, num_values, size=(resamples, num_values))
+    draws += np.arange(resamples)[:, None] * num_values
+    counts = np.bincount(draws.ravel(), minlength=resamples * num_values)
+    weights = counts.reshape(resamples, num_values).astype(np.float64)
+    totals = weights.sum(axis=1)
+
+    mean = weights @ values / totals
+    deviations = values - mean[:, None]
+    deviations *= deviations
+    m2 = np.einsum("ij,ij->i", weights, deviations) / totals
+    deviations *= deviations
+    m4 = np.einsum("ij,ij->i", weights, deviations) / totals
+
+    cumulative = np.cumsum(weights, axis=1)
+    median = values[
+        [np.searchsorted(row, total / 2) for row, total in zip(cumulative, totals)]
+    ]
+    if width == 0:
+        mode = np.full(resamples, stats.mode[0])
+    else:
+        mode = np.array(
+            [
+                histogram_peak(
+                    np.bincount(bins, weights=row), low, width, step, values[-1]
+                )
+                for row in weights
+            ]
+        )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resampled = IntensityStats(
+            mean=mean,
+            std=np.sqrt(m2),
+            median=median,
+            mode=mode,
+            max=np.full(resamples, values[-1]),
+            kurtosis=m4 / m2**2 - 3,
+        )
+        errors = np.array(
+            [
+                np.std(resampled.kurtosis) / (stats.kurtosis[0] + 3),
+                np.std(resampled.median_skewness)
+                / max(1.0, abs(stats.median_skewness[0])),
+                np.std(resampled.mode_skewness)
+                / max(1.0, abs(stats.mode_skewness[0])),
+            ]
+        )
+
+    return stats, errors
+
+
+def sorted_mode(values: np.ndarray) -> float:
+    """Most common value of a sorted 1D array, the smallest one on ties."""
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    run_lengths = np.diff(np.r_[starts, len(values)])
+    return values[starts[np.argmax(run_lengths)]]
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Union
+
+from core import BarcodeConfig, EffectiveConfig, ResultsBase
+
+# Settings that change how fast results are computed or what is printed, but
+# not the results themselves, so they are left out of cache keys
+RESULT_INDEPENDENT_SETTINGS = {
+    "analysis": {"workers", "use_cache", "cache_dir", "cache_size_mb", "resume"},
+    "output": {"verbose", "generate_dataset_barcode"},
+    "binarization": {"batch_size", "threads"},
+    "optical_flow": {"threads"},
+}
+
+# Config sections each module's results depend on, besides the file itself
+MODULE_SETTINGS = {
+    "Binarization": ("binarization", "output"),
+    "Optical Flow": ("optical_flow", "output"),
+    "Intensity Distribution": ("intensity_distribution", "output"),
+}
+
+# Packages whose source determines the results
+RESULT_PACKAGES = ("analysis", "core", "utils")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "barcode")
+
+# Blocks of a file read into its fingerprint, spread evenly from start to end
+FINGERPRINT_BLOCKS = 8
+FINGERPRINT_BLOCK_SIZE = 2**16
+
+# Estimated size of each cache directory in this process, see ResultCache.put
+_cache_sizes: Dict[str, int] = {}
+
+# Share of max_bytes a full cache is trimmed to, so it is not scanned again
+# until that much more has been stored
+EVICT_TO = 0.9
+
+
+def file_fingerprint(filepath: str) -> str:
+    """
+    Digest of a file's size, modification time and a few sampled blocks.
+
+    Only FINGERPRINT_BLOCKS blocks are read, so fingerprinting a large video
+    costs a few small reads rather than reading all of it. Any write to the
+    file updates its modification time, and the sampled blocks also catch a
+    different file restored with the same size and time.
+    """
+    stat = os.stat(filepath)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+
+    last_offset = max(0, stat.st_size - FINGERPRINT_BLOCK_SIZE)
+    offsets = sorted(
+        {last_offset * i // (FINGERPRINT_BLOCKS - 1) for i in range(FINGERPRINT_BLOCKS)}
+    )
+    with open(filepath, "rb") as file:
+        for offset in offsets:
+            file.seek(offset)
+            digest.update(file.read(FINGERPRINT_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def config_digest(
+    config: Union[BarcodeConfig, EffectiveConfig],
+    sections: Iterable[str] = tuple(BarcodeConfig.__dataclass_fields__),
+) -> str:
+    """
+    Digest of the settings in the given sections that affect results.
+
+    Built with hashlib from the sections' values, so unlike hash() it is the
+    same in every process and run.
+    """
+    settings = {
+        section_name: {
+            field_name: value
+            for field_name, value in getattr(config, section_name).to_dict().items()
+            if field_name not in RESULT_INDEPENDENT_SETTINGS.get(section_name, ())
+        }
+        for section_name in sections
+    }
+    encoded = json.dumps(settings, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Digest of the analysis source code, so results from older code are not reused.
+
+    Frozen app builds ship no sources, so the app's executable is
+    fingerprinted instead, which changes with every build.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    found_sources = False
+    for package in RESULT_PACKAGES:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, package)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    found_sources = True
+                    path = os.path.join(dirpath, filename)
+                    digest.update(os.path.relpath(path, root).encode("utf-8"))
+                    with open(path, "rb") as source:
+                        digest.update(source.read())
+
+    if not found_sources:
+        digest.update(file_fingerprint(sys.executable).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("/".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache of analysis results.
+
+    It holds each file's ChannelResults, and each module's results for every
+    channel of a file (see ModuleResultCache). Entries are keyed by the
+    file's contents, the settings that affect the results and the code
+    version, so a renamed file still hits and any change to the file,
+    settings or code misses. Each entry is one pickle file, written
+    atomically so concurrent workers can share the cache. Its modification
+    time marks its last use, and the least recently used entries are evicted
+    once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: BarcodeConfig) -> Optional["ResultCache"]:
+        """The cache configured in the analysis settings, None if bypassed."""
+        if not config.analysis.use_cache:
+            return None
+        cache_dir = config.analysis.cache_dir or DEFAULT_CACHE_DIR
+        return cls(cache_dir, config.analysis.cache_size_mb * 2**20)
+
+    def key(self, fingerprint: str, config: BarcodeConfig) -> str:
+        """Cache key of a file's results with the given settings."""
+        return _digest(fingerprint, config_digest(config), code_version())
+
+    def for_file(self, fingerprint: str) -> "ModuleResultCache":
+        """Per-module view of the cache for the file with this fingerprint."""
+        return ModuleResultCache(self, fingerprint)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached results for a key, None on a miss or an unreadable entry."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as entry:
+                results = pickle.load(entry)
+            os.utime(path)  # Mark as recently used
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return results
+
+    def put(self, key: str, results: Any) -> None:
+        """
+        Store results under a key, evicting entries beyond the size bound.
+
+        The directory is only scanned the first time this process stores into
+        it and whenever the sizes stored since then would take it past
+        max_bytes, not on every entry.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as entry:
+                pickle.dump(results, entry)
+                size = entry.tell()
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        estimate = _cache_sizes.get(self.cache_dir)
+        if estimate is None or estimate + size > self.max_bytes:
+            _cache_sizes[self.cache_dir] = self._evict()
+        else:
+            _cache_sizes[self.cache_dir] = estimate + size
+
+    def _evict(self) -> int:
+        """
+        Remove least recently used entries once the cache exceeds max_bytes,
+        down to EVICT_TO of it. Returns the size of the entries kept.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another worker
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return total
+
+        for _, size, path in sorted(entries):
+            if total <= EVICT_TO * self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+class ModuleResultCache:
+    """
+    Results of each analysis module for the channels of one file.
+
+    A module's entry is keyed by the file, the channel, the module and only
+    the config sections in MODULE_SETTINGS, so changing one module's settings
+    only reruns that module.
+    """
+
+    def __init__(self, cache: ResultCache, fingerprint: str):
+        self.cache = cache
+        self.fingerprint = fingerprint
+
+    def key(self, channel: int, module: str, config: EffectiveConfig) -> str:
+        """Cache key of a module's results for a channel of the file."""
+        settings = config_digest(config, MODULE_SETTINGS[module])
+        return _digest(self.fingerprint, str(channel), module, settings, code_version())
+
+    def get(
+        self, channel: int, module: str, config: EffectiveConfig
+    ) -> Optional[ResultsBase]:
+        """Cached results of a module for a channel, None on a miss."""
+        return self.cache.get(self.key(channel, module, config))
+
+    def put(
+        self, channel: int, module: str, config: EffectiveConfig, results: ResultsBase
+    ) -> None:
+        """Store a module's results for a channel."""
+        try:
+            self.cache.put(self.key(channel, module, config), results)
+        except OSError:
+            pass  # Caching is best effort, the results are still used
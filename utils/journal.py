@@ -0,0 +1,94 @@
+import json
+import os
+from typing import Iterator, List, Set, Tuple
+
+from core import ChannelResults
+from utils.reader import channel_results_from_row
+
+
+class ResultsJournal:
+    """
+    Append-only record of each finished file's results, for resuming runs.
+
+    Every file that finishes is written as one JSON line holding its channels'
+    summary rows (as the summary CSV would write them), intensity flags and
+    config overrides. The line is flushed and fsynced before the run moves on,
+    so a run that dies keeps everything finished before it. A line cut short
+    by a crash is ignored when reading.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def reset(self) -> None:
+        """Start an empty journal for a new run."""
+        open(self.path, "w", encoding="utf-8").close()
+
+    def resume(self) -> Set[str]:
+        """
+        Continue an interrupted run's journal, returning its finished files.
+
+        A last line cut short by a crash is dropped so new entries start on a
+        line of their own.
+        """
+        if not os.path.exists(self.path):
+            self.reset()
+            return set()
+
+        with open(self.path, "rb+") as journal:
+            content = journal.read()
+            if content and not content.endswith(b"\n"):
+                journal.truncate(content.rfind(b"\n") + 1)
+
+        return self.completed_files()
+
+    def remove(self) -> None:
+        """Delete the journal once the run's outputs are saved."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def record(self, filepath: str, results: List[ChannelResults]) -> None:
+        """Durably append a finished file's results."""
+        entry = {
+            "file": filepath,
+            "results": [
+                {
+                    "row": [str(value) for value in result.get_data()],
+                    "intensity_flag": int(result.intensity.flag),
+                    "config_overrides": result.config_overrides,
+                }
+                for result in results
+            ],
+        }
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def entries(self) -> Iterator[Tuple[str, List[ChannelResults]]]:
+        """Each journaled file with its results, in the order they finished."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Cut short by a crash while writing
+
+                results = []
+                for result_entry in entry["results"]:
+                    result = channel_results_from_row(result_entry["row"])
+                    result.intensity.flag = result_entry["intensity_flag"]
+                    result.config_overrides = result_entry["config_overrides"]
+                    results.append(result)
+                yield entry["file"], results
+
+    def completed_files(self) -> Set[str]:
+        """Files whose results are in the journal."""
+        return {filepath for filepath, _ in self.entries()}
+
+    def read_results(self) -> List[ChannelResults]:
+        """All journaled results, in the order their files finished."""
+        return [result for _, results in self.entries() for result in results]
@@ -1,30 +1,395 @@
 import builtins
 import functools
 import os
+from abc import ABC, abstractmethod
 from itertools import pairwise
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import imageio.v3 as iio
 import nd2
 import numpy as np
 
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
 from core import (
-    BarcodeConfig,
     ChannelResults,
     BinarizationResults,
     IntensityResults,
     FlowResults,
+    ResultsTable,
 )
 from utils.analysis import check_channel_dim
 from utils import vprint
 
 
+class VideoReader(ABC):
+    """
+    Frame-addressable video with (T, Y, X, C) axes.
+
+    Planes are decoded on demand, so `reader[t, :, :, c]` only touches the
+    data for frame t of channel c. Slicing over several frames or channels
+    returns a NumPy array holding just the requested planes.
+    """
+
+    ndim = 4
+
+    @property
+    @abstractmethod
+    def shape(self) -> Tuple[int, int, int, int]:
+        """Video shape as (frames, height, width, channels)."""
+        pass
+
+    @property
+    @abstractmethod
+    def dtype(self) -> np.dtype:
+        """Pixel data type."""
+        pass
+
+    @abstractmethod
+    def read_frame(self, t: int, c: int) -> np.ndarray:
+        """Decode a single (Y, X) plane for frame t and channel c."""
+        pass
+
+    @property
+    def metadata(self) -> Dict[str, float]:
+        """Acquisition metadata parsed from the file, if any."""
+        return {}
+
+    def close(self) -> None:
+        """Release any open file handles."""
+        pass
+
+    def __enter__(self) -> "VideoReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is Ellipsis for k in key):
+            idx = next(i for i, k in enumerate(key) if k is Ellipsis)
+            fill = (slice(None),) * (self.ndim - len(key) + 1)
+            key = key[:idx] + fill + key[idx + 1 :]
+        if len(key) > self.ndim:
+            raise IndexError(f"Too many indices for video: {len(key)}")
+        key = key + (slice(None),) * (self.ndim - len(key))
+        t_key, y_key, x_key, c_key = key
+
+        num_frames, height, width, num_channels = self.shape
+        frames = np.arange(num_frames)[t_key]
+        channels = np.arange(num_channels)[c_key]
+
+        out = np.empty(
+            (np.size(frames), height, width, np.size(channels)), dtype=self.dtype
+        )
+        for i, t in enumerate(np.atleast_1d(frames)):
+            for j, c in enumerate(np.atleast_1d(channels)):
+                out[i, :, :, j] = self.read_frame(int(t), int(c))
+
+        return out[
+            0 if np.ndim(frames) == 0 else slice(None),
+            y_key,
+            x_key,
+            0 if np.ndim(channels) == 0 else slice(None),
+        ]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        data = self[:]
+        return data if dtype is None else data.astype(dtype)
+
+    def is_empty(self) -> bool:
+        """Check whether every frame is zero, stopping at the first non-zero frame."""
+        return not any(self[t].any() for t in range(len(self)))
+
+    def channel(self, channel: int) -> "VideoChannel":
+        """Lazy (T, Y, X) view of a single channel."""
+        return VideoChannel(self, channel)
+
+
+class VideoChannel:
+    """Lazy (T, Y, X) view of one channel of a VideoReader."""
+
+    ndim = 3
+
+    def __init__(self, video: VideoReader, channel: int):
+        num_frames, height, width, num_channels = video.shape
+        self._video = video
+        self.channel = range(num_channels)[channel]
+        self.shape = (num_frames, height, width)
+        self.dtype = video.dtype
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        return self._video[key[:1] + (slice(None), slice(None), self.channel)][
+            (Ellipsis,) + key[1:]
+        ]
+
+
+class ArrayVideoReader(VideoReader):
+    """VideoReader over an already decoded (T, Y, X, C) array."""
+
+    def __init__(self, data: np.ndarray):
+        self._data = data
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        return self._data.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    def read_frame(self, t: int, c: int) -> np.ndarray:
+        return np.asarray(self._data[t, :, :, c])
+
+
+class TiffVideoReader(VideoReader):
+    """
+    Lazy TIFF reader.
+
+    Uncompressed, contiguous stacks are memory-mapped; everything else is
+    decoded page by page as frames are requested.
+    """
+
+    def __init__(self, file_path: str):
+        self._tif = tifffile.TiffFile(file_path)
+        series = self._tif.series[0]
+        series_shape = series.shape
+
+        # Match the axis handling of the eager imageio loader
+        if len(series_shape) == 3:
+            self._layout = "TYX"
+            self._shape = series_shape + (1,)
+        elif len(series_shape) == 4 and series_shape[3] != min(series_shape):
+            self._layout = "TCYX"
+            t, c, y, x = series_shape
+            self._shape = (t, y, x, c)
+        elif len(series_shape) == 4:
+            self._layout = "TYXC"
+            self._shape = series_shape
+        else:
+            self._tif.close()
+            raise TypeError(
+                "Incorrect file dimensions: file must be time series data with 1+ channels (4 dimensions total)"
+            )
+
+        self._dtype = np.dtype(series.dtype)
+        self._series = series
+        self._data = None
+        self._pages = None
+        self._last_page = (None, None)
+
+        try:
+            data = tifffile.memmap(file_path, series=0, mode="r")
+            self._data = self._to_tyxc(data)
+            return
+        except ValueError:
+            pass  # Compressed or non-contiguous, fall back to page decoding
+
+        pages = series.pages
+        page_ndim = len(series.keyframe.shape)
+        num_pages = int(np.prod(series_shape[: len(series_shape) - page_ndim]))
+        if len(pages) == num_pages and (page_ndim == 2 or self._layout == "TYXC"):
+            self._pages = pages
+        else:
+            # Unusual page layout, decode the whole series once
+            self._data = self._to_tyxc(series.asarray())
+
+    def _to_tyxc(self, data: np.ndarray) -> np.ndarray:
+        """View series data with (T, Y, X, C) axes without copying."""
+        if self._layout == "TYX":
+            return data[..., np.newaxis]
+        if self._layout == "TCYX":
+            return data.transpose(0, 2, 3, 1)
+        return data
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        return self._shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    def read_frame(self, t: int, c: int) -> np.ndarray:
+        if self._data is not None:
+            return np.asarray(self._data[t, :, :, c])
+
+        if self._layout == "TCYX":
+            page_idx = t * self._shape[3] + c
+        else:
+            page_idx = t
+
+        # Interleaved pages hold every channel, keep the last one decoded
+        last_idx, last_page = self._last_page
+        if page_idx != last_idx:
+            last_page = self._pages[page_idx].asarray()
+            self._last_page = (page_idx, last_page)
+
+        return last_page[..., c] if self._layout == "TYXC" else last_page
+
+    def close(self) -> None:
+        self._data = None
+        self._pages = None
+        self._last_page = (None, None)
+        self._tif.close()
+
+
+class ND2VideoReader(VideoReader):
+    """
+    Lazy ND2 reader.
+
+    Keeps one ND2File handle open and decodes single timepoints with
+    `ND2File.read_frame`, so only the requested (t, c) planes are read.
+    """
+
+    def __init__(self, file_path: str):
+        self._nd = nd2.ND2File(file_path)
+        try:
+            sizes = self._nd.sizes
+            if len(sizes) >= 5:
+                raise TypeError(
+                    "Incorrect file dimensions: file must be time series data with 1+ channels (4 dimensions total)"
+                )
+            if "Z" in sizes:
+                raise TypeError("Z-stack identified, skipping to next file...")
+            if "T" not in sizes or len(self._nd.shape) <= 2 or sizes["T"] <= 5:
+                raise TypeError(
+                    "Too few frames, unable to capture dynamics, skipping to next file..."
+                )
+        except TypeError:
+            self._nd.close()
+            raise
+
+        loops = [axis for axis in sizes if axis not in ("Y", "X", "C", "S")]
+        self._channel_axis = "C" if "C" in sizes else ("S" if "S" in sizes else None)
+        self._data = None
+        self._last_frame = (None, None)
+
+        if loops == ["T"]:
+            num_channels = sizes[self._channel_axis] if self._channel_axis else 1
+            self._shape = (sizes["T"], sizes["Y"], sizes["X"], num_channels)
+        else:
+            # Multiple loops (e.g. T + P) are not frame addressable by time alone;
+            # decode eagerly and treat the second axis as channels as before
+            data = self._nd.asarray()
+            self._data = np.swapaxes(np.swapaxes(data, 1, 2), 2, 3)
+            self._shape = self._data.shape
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        return self._shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self._nd.dtype)
+
+    @functools.cached_property
+    def metadata(self) -> Dict[str, float]:
+        """Frame interval (s) and nm/pixel ratio parsed once from the open file."""
+        times = self._nd.events(orient="list")["Time [s]"]
+        frame_interval = np.array([y - x for x, y in pairwise(times)]).mean()
+        nm_pix_ratio = 1000 / (self._nd.voxel_size()[0])
+        return {"frame_interval_s": frame_interval, "nm_pixel_ratio": nm_pix_ratio}
+
+    def read_frame(self, t: int, c: int) -> np.ndarray:
+        if self._data is not None:
+            return self._data[t, :, :, c]
+
+        # A timepoint holds every channel, keep the last one decoded
+        last_t, frame = self._last_frame
+        if t != last_t:
+            frame = np.array(self._nd.read_frame(t))
+            self._last_frame = (t, frame)
+
+        if frame.ndim == 2:
+            return frame
+        return frame[c] if self._channel_axis == "C" else frame[..., c]
+
+    def close(self) -> None:
+        self._data = None
+        self._last_frame = (None, None)
+        self._nd.close()
+
+
+class PlannedVideo(VideoReader):
+    """
+    VideoReader restricted to a frame plan.
+
+    Frames outside the plan are never decoded; requesting one is an error.
+    """
+
+    def __init__(self, source: VideoReader, frames: Iterable[int]):
+        self._source = source
+        self.frames = sorted({int(t) % len(source) for t in frames})
+        self._planned = set(self.frames)
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        return self._source.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._source.dtype
+
+    @property
+    def metadata(self) -> Dict[str, float]:
+        return self._source.metadata
+
+    def read_frame(self, t: int, c: int) -> np.ndarray:
+        if t not in self._planned:
+            raise IndexError(f"Frame {t} is not part of the frame plan")
+        return self._source.read_frame(t, c)
+
+    def close(self) -> None:
+        self._source.close()
+
+
+def get_channel(
+    file: Union[VideoReader, np.ndarray], channel: int
+) -> Union[VideoChannel, np.ndarray]:
+    """Return the (T, Y, X) frames of a channel, lazily for VideoReaders."""
+    if isinstance(file, VideoReader):
+        return file.channel(channel)
+    return file[:, :, :, channel]
+
+
+def open_video(file_path: str) -> VideoReader:
+    """Open a TIFF or ND2 video as a frame-addressable VideoReader."""
+    if file_path.endswith((".tif", ".tiff")):
+        if tifffile is not None:
+            return TiffVideoReader(file_path)
+
+        file = iio.imread(file_path)
+        file = np.reshape(file, (file.shape + (1,))) if len(file.shape) == 3 else file
+        if file.shape[3] != min(file.shape):
+            file = np.swapaxes(np.swapaxes(file, 1, 2), 2, 3)
+        return ArrayVideoReader(file)
+
+    if file_path.endswith(".nd2"):
+        return ND2VideoReader(file_path)
+
+    raise TypeError(f"Unsupported file format: {file_path}")
+
+
 def read_file(
     file_path: str,
     count_list: list,
     accept_dim: bool = False,
     allow_large_files: bool = True,
-) -> Optional[np.ndarray]:
+) -> Optional[VideoReader]:
     """Read a file and return its data if valid."""
 
     print = functools.partial(builtins.print, flush=True)
@@ -44,54 +409,23 @@ def read_file(
         )
         return None
 
-    if file_path.endswith(".tif"):
-        file = iio.imread(file_path)
-        file = np.reshape(file, (file.shape + (1,))) if len(file.shape) == 3 else file
-        if file.shape[3] != min(file.shape):
-            file = np.swapaxes(np.swapaxes(file, 1, 2), 2, 3)
-    elif file_path.endswith(".nd2"):
+    if file_path.endswith(".nd2"):
         try:
-            with nd2.ND2File(file_path) as ndfile:
-                if len(ndfile.sizes) >= 5:
-                    count_list[0] += 1
-                    raise TypeError(
-                        "Incorrect file dimensions: file must be time series data with 1+ channels (4 dimensions total)"
-                    )
-                if "Z" in ndfile.sizes:
-                    count_list[0] += 1
-                    raise TypeError("Z-stack identified, skipping to next file...")
-                if (
-                    "T" not in ndfile.sizes
-                    or len(ndfile.shape) <= 2
-                    or ndfile.sizes["T"] <= 5
-                ):
-                    count_list[0] += 1
-                    raise TypeError(
-                        "Too few frames, unable to capture dynamics, skipping to next file..."
-                    )
-                if ndfile == None:
-                    raise TypeError("Unable to read file, skipping to next file...")
-                file = ndfile.asarray()
-                shape = (
-                    file.shape[0],
-                    file.shape[2],
-                    file.shape[3],
-                    file.shape[1],
-                )  # Reorder
-                file = np.swapaxes(np.swapaxes(file, 1, 2), 2, 3)
-
+            file = open_video(file_path)
         except Exception as e:
+            count_list[0] += 1
             raise TypeError(e)
+    else:
+        file = open_video(file_path)
 
-        if not isinstance(file, np.ndarray):
-            return None
-
-    if (file == 0).all():
+    if file.is_empty():
         print("Empty file: can not process, skipping to next file...")
+        file.close()
         return None
 
     if not accept_dim and check_channel_dim(file[0]):
         print(file_path + " is too dim, skipping to next file...")
+        file.close()
         return None
 
     else:
@@ -99,8 +433,8 @@ def read_file(
         return file
 
 
-def read_csv_to_channel_results(filepath: str) -> List[ChannelResults]:
-    """Read results from a CSV file into a list of ChannelResults."""
+def channel_results_from_row(row: List[str]) -> ChannelResults:
+    """Parse a summary CSV row, as written by results_to_csv, into ChannelResults."""
 
     def get_value(value_str: str) -> float:
         """Convert string to float, handling empty strings as NaN."""
@@ -112,6 +446,45 @@ def read_csv_to_channel_results(filepath: str) -> List[ChannelResults]:
             # If conversion fails, return NaN
             return np.nan
 
+    # The first column is the video's filepath, the rest are numbers
+    data = [get_value(value) for value in row[1:]]
+
+    if np.isnan(data[0]) or np.isnan(data[1]):
+        raise ValueError(f"Invalid channel or dim_channel_flag in row: {row}")
+
+    return ChannelResults(
+        filepath=row[0],
+        channel=int(data[0]),
+        dim_channel_flag=int(data[1]),
+        binarization=BinarizationResults(
+            spanning=data[2],
+            max_island_size=data[3],
+            max_void_size=data[4],
+            avg_island_percent_change=data[5],
+            avg_void_percent_change=data[6],
+            island_size_initial=data[7],
+            island_size_initial2=data[8],
+        ),
+        intensity=IntensityResults(
+            max_kurtosis=data[9],
+            max_median_skew=data[10],
+            max_mode_skew=data[11],
+            kurtosis_diff=data[12],
+            median_skew_diff=data[13],
+            mode_skew_diff=data[14],
+        ),
+        flow=FlowResults(
+            mean_speed=data[15],
+            delta_speed=data[16],
+            mean_theta=data[17],
+            mean_sigma_theta=data[18],
+        ),
+    )
+
+
+def read_csv_to_channel_results(filepath: str) -> List[ChannelResults]:
+    """Read results from a CSV file into a list of ChannelResults."""
+
     expected_headers = ChannelResults.get_headers(just_metrics=False)
 
     import csv
@@ -126,67 +499,95 @@ def read_csv_to_channel_results(filepath: str) -> List[ChannelResults]:
         ), f"CSV headers {headers} do not match expected {expected_headers}"
 
         for row in reader:
-
-            data = [get_value(value) for value in row]
-
-            if np.isnan(data[0]) or np.isnan(data[1]):
-                raise ValueError(f"Invalid channel or dim_channel_flag in row: {row}")
-
-            results.append(
-                ChannelResults(
-                    channel=int(data[0]),
-                    dim_channel_flag=int(data[1]),
-                    binarization=BinarizationResults(
-                        spanning=data[2],
-                        max_island_size=data[3],
-                        max_void_size=data[4],
-                        avg_island_percent_change=data[5],
-                        avg_void_percent_change=data[6],
-                        island_size_initial=data[7],
-                        island_size_initial2=data[8],
-                    ),
-                    intensity=IntensityResults(
-                        max_kurtosis=data[9],
-                        max_median_skew=data[10],
-                        max_mode_skew=data[11],
-                        kurtosis_diff=data[12],
-                        median_skew_diff=data[13],
-                        mode_skew_diff=data[14],
-                    ),
-                    flow=FlowResults(
-                        mean_speed=data[15],
-                        delta_speed=data[16],
-                        mean_theta=data[17],
-                        mean_sigma_theta=data[18],
-                    ),
-                )
-            )
+            results.append(channel_results_from_row(row))
 
     return results
 
 
-def extract_nd2_metadata(filepath: str, config: BarcodeConfig) -> None:
-    """Extract metadata from ND2 file and update config object."""
+def read_csv_to_results_table(filepath: str) -> ResultsTable:
+    """Read results from a CSV file into a ResultsTable, parsing by column."""
 
-    if not nd2.is_supported_file(filepath):
-        return
+    expected_headers = ChannelResults.get_headers(just_metrics=False)
+
+    import csv
+
+    with open(filepath, "r", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        headers = next(reader)
 
+        assert (
+            headers == expected_headers
+        ), f"CSV headers {headers} do not match expected {expected_headers}"
+
+        if not csvfile.readline():
+            return ResultsTable.empty()
+
+    # The first column is the video's filepath, the rest are numbers
+    read_columns = functools.partial(
+        np.loadtxt,
+        filepath,
+        delimiter=",",
+        quotechar='"',
+        skiprows=1,
+        encoding="utf-8",
+    )
     try:
-        with nd2.ND2File(filepath) as ndfile:
-            # Extract frame timing metadata
-            times = ndfile.events(orient="list")["Time [s]"]
-            frame_interval = np.array([y - x for x, y in pairwise(times)]).mean()
+        filepaths = read_columns(dtype=str, usecols=0, ndmin=1)
+        data = read_columns(usecols=range(1, len(expected_headers)), ndmin=2)
+    except ValueError:
+        # Empty or non-numeric values become NaN, as when reading row by row
+        return ResultsTable.from_channel_results(
+            read_csv_to_channel_results(filepath)
+        )
 
-            # Extract spatial metadata
-            nm_pix_ratio = 1000 / (ndfile.voxel_size()[0])
+    if np.isnan(data[:, :2]).any():
+        raise ValueError(f"Invalid channel or dim_channel_flag in {filepath}")
 
-            # Update config with extracted metadata
-            config.optical_flow.frame_interval_s = frame_interval
-            config.optical_flow.nm_pixel_ratio = nm_pix_ratio
+    return ResultsTable(
+        filepaths=filepaths,
+        channels=data[:, 0].astype(np.int64),
+        flags=data[:, 1].astype(np.int64),
+        metrics=np.ascontiguousarray(data[:, 2:]),
+    )
 
-            vprint(
-                f"Extracted ND2 metadata: frame_interval={frame_interval:.4f}s, nm_pixel_ratio={nm_pix_ratio:.2f}"
-            )
+
+def extract_nd2_metadata(
+    filepath: str, file: Optional[VideoReader] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Extract metadata from ND2 file as config overrides.
+
+    Returns {section: {field: value}} overrides for an EffectiveConfig, or an
+    empty dict if the file is not an ND2 file or has no usable metadata. If
+    the file is already open as an ND2VideoReader, its parsed metadata is
+    reused instead of reopening the file.
+    """
+
+    if not nd2.is_supported_file(filepath):
+        return {}
+
+    try:
+        if file is not None and file.metadata:
+            metadata = file.metadata
+        else:
+            with ND2VideoReader(filepath) as ndfile:
+                metadata = ndfile.metadata
+
+        # Plain floats, so the overrides can be saved to settings.yaml
+        frame_interval = float(metadata["frame_interval_s"])
+        nm_pix_ratio = float(metadata["nm_pixel_ratio"])
+
+        vprint(
+            f"Extracted ND2 metadata: frame_interval={frame_interval:.4f}s, nm_pixel_ratio={nm_pix_ratio:.2f}"
+        )
 
     except Exception as e:
         vprint(f"Warning: Could not extract ND2 metadata: {e}")
+        return {}
+
+    return {
+        "optical_flow": {
+            "frame_interval_s": frame_interval,
+            "nm_pixel_ratio": nm_pix_ratio,
+        }
+    }
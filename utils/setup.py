@@ -67,6 +67,12 @@ def setup_paths(root_dir: str, is_single_file: bool):
     return base_path, base_name, ff_filepath, time_filepath
 
 
+def journal_path(base_path: str, base_name: str, is_single_file: bool) -> str:
+    """Path of a run's results journal, next to its failed files log."""
+    name = "journal.jsonl" if not is_single_file else f"{base_name}_journal.jsonl"
+    return os.path.join(base_path, name)
+
+
 def setup_csv_writer(filename: str):
     """Setup CSV writer and file handle."""
     myfile = open(filename, "w")
@@ -33,8 +33,10 @@ class Timer:
 
     def _log_time_since(self, _time: float, message: str = "") -> str:
         """Log a message with the time elapsed since a given time."""
-        current_time = time.time()
-        elapsed_time = current_time - _time
+        return self.log_elapsed(time.time() - _time, message)
+
+    def log_elapsed(self, elapsed_time: float, message: str = "") -> str:
+        """Log a message with an elapsed time measured elsewhere (e.g. a worker)."""
         elapsed_time_str = get_time_as_string(elapsed_time)
 
         log_message = f"{message}: {elapsed_time_str}" if message else elapsed_time_str
@@ -43,7 +45,7 @@ class Timer:
         # Import vprint locally to avoid circular import
         from utils import vprint
         vprint(log_message)
-        self.last_log_time = current_time
+        self.last_log_time = time.time()
 
         return log_message
 
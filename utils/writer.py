@@ -1,10 +1,11 @@
 import csv
 import os
+import time
 import warnings
-from typing import Dict, List, Optional, TypeAlias, TypeVar
+from typing import Dict, List, Optional, Type, TypeAlias, TypeVar
 
-from core import ResultsBase, sort_channel_results_by_metric
-from utils.reader import read_csv_to_channel_results
+from core import ChannelResults, ResultsBase, ResultsTable
+from utils.reader import read_csv_to_results_table
 from visualization.barcode import gen_combined_barcode
 
 warnings.filterwarnings("ignore")
@@ -14,6 +15,81 @@ R = TypeVar("R", bound=ResultsBase)
 
 ExtraColumns: TypeAlias = Dict[str, List[str]]
 
+# Longest a streamed row waits in the write buffer before reaching the file
+FLUSH_INTERVAL_S = 30.0
+
+
+class ResultsWriter:
+    """
+    Write results of one type to a CSV file as they are produced.
+
+    The file is opened and its header written once, then each result is
+    appended as a row. Rows are flushed at least every flush_interval_s
+    seconds and when the writer is closed, so the rows of a long run can be
+    read while it is still going.
+    """
+
+    def __init__(
+        self,
+        output_filepath: str,
+        result_type: Type[R],
+        extra_column_names: Optional[List[str]] = None,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+        **kwargs,
+    ):
+        # Ensure the directory exists
+        assert os.path.exists(
+            os.path.dirname(output_filepath)
+        ), "Output directory does not exist."
+
+        self.output_filepath = output_filepath
+        self.result_type = result_type
+        self.flush_interval_s = flush_interval_s
+        self.kwargs = kwargs
+        self.rows_written = 0
+
+        headers = result_type.get_headers(**kwargs)
+        if extra_column_names:
+            headers = list(extra_column_names) + headers
+
+        self._file = open(output_filepath, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(headers)
+        self._last_flush = time.monotonic()
+
+    def write(self, result: R, extra_values: Optional[List[str]] = None) -> None:
+        """Append a result's row, after the values of any extra columns."""
+        assert (
+            type(result) == self.result_type
+        ), f"All results must be the same type. Got {type(result).__name__}, expected {self.result_type.__name__}"
+
+        row = list(extra_values) if extra_values else []
+        row.extend(result.get_data(**self.kwargs))
+        self._writer.writerow(row)
+        self.rows_written += 1
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def write_all(self, results: List[R]) -> None:
+        """Append the rows of several results."""
+        for result in results:
+            self.write(result)
+
+    def flush(self) -> None:
+        """Push the rows written so far to the file."""
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
 
 def results_to_csv(
     results: List[R],
@@ -37,26 +113,30 @@ def results_to_csv(
             type(result) == expected_type
         ), f"All results must be the same type. Result {i} is {type(result).__name__}, expected {expected_type.__name__}"
 
+    extra_column_names = list(extra_columns.keys()) if extra_columns else None
+    with ResultsWriter(
+        output_filepath, expected_type, extra_column_names, **kwargs
+    ) as writer:
+        for i, result in enumerate(results):
+            extra_values = None
+            if extra_columns:
+                extra_values = [values[i] for values in extra_columns.values()]
+            writer.write(result, extra_values)
+
+
+def results_table_to_csv(table: ResultsTable, output_filepath: str) -> None:
+    """Write a ResultsTable to a CSV file, as results_to_csv writes its rows."""
+    assert len(table) > 0, "Results table cannot be empty."
+
     # Ensure the directory exists
     assert os.path.exists(
         os.path.dirname(output_filepath)
     ), "Output directory does not exist."
 
-    headers = results[0].get_headers(**kwargs)
-    if extra_columns:
-        headers = list(extra_columns.keys()) + headers
-
     with open(output_filepath, "w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(headers)
-
-        for i, result in enumerate(results):
-            row = []
-            if extra_columns:
-                for col_name in extra_columns.keys():
-                    row.append(extra_columns[col_name][i])
-            row.extend(result.get_data(**kwargs))
-            writer.writerow(row)
+        writer.writerow(ChannelResults.get_headers(just_metrics=False))
+        writer.writerows(table.get_rows())
 
 
 def generate_aggregate_csv(
@@ -80,27 +160,27 @@ def generate_aggregate_csv(
     if not csv_files:
         return
 
-    all_results = []
+    tables = []
 
-    # Read each CSV file back into ChannelResults
+    # Read each CSV file into a columnar table
     for csv_file in csv_files:
         try:
-            results = read_csv_to_channel_results(csv_file)
-            all_results.extend(results)
+            tables.append(read_csv_to_results_table(csv_file))
         except Exception as e:
             print(f"Warning: Could not read {csv_file}: {e}")
             continue
 
-    if not all_results:
+    all_results = ResultsTable.concat(tables)
+    if len(all_results) == 0:
         print("No valid data found in CSV files")
         return
 
     # Sort if requested
     if sort_metric:
-        sort_channel_results_by_metric(all_results, sort_metric)
+        all_results = all_results.sort_by(sort_metric)
 
-    # Write aggregate CSV using the clean writer
-    results_to_csv(all_results, output_csv, just_metrics=False)
+    # Write aggregate CSV
+    results_table_to_csv(all_results, output_csv)
 
     # Generate barcode if requested
     if gen_barcode:
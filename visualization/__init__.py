@@ -3,6 +3,7 @@ from visualization.analysis import (
     save_flow_visualization,
     save_binarization_plot,
     save_intensity_plot,
+    save_intensity_timecourse_plot,
     create_summary_visualization,
 )
 
@@ -13,6 +14,7 @@ __all__ = [
     "save_flow_visualization",
     "save_binarization_plot",
     "save_intensity_plot",
+    "save_intensity_timecourse_plot",
     "create_summary_visualization",
     "gen_combined_barcode",
 ]
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Dict, List
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -163,6 +163,25 @@ def save_intensity_plot(
     return fig
 
 
+def save_intensity_timecourse_plot(
+    frames: np.ndarray, metrics: Dict[str, np.ndarray]
+) -> plt.Figure:
+    """Plot the per-frame kurtosis and skewness over the whole video."""
+
+    fig, ax = plt.subplots(figsize=(5, 5))
+
+    ax.plot(frames, metrics["kurtosis"], c="darkred", label="Kurtosis")
+    ax.plot(frames, metrics["median_skewness"], c="purple", label="Median Skewness")
+    ax.plot(frames, metrics["mode_skewness"], c="teal", label="Mode Skewness")
+
+    ax.axhline(0, color="dimgray", alpha=0.6)
+    ax.set_xlabel("Frame")
+    ax.set_ylabel("Intensity distribution shape")
+    ax.legend()
+
+    return fig
+
+
 def create_summary_visualization(figures: List[plt.Figure], output_path: str) -> None:
     """Create combined summary plot from analysis figures."""
     if not figures:
@@ -1,14 +1,14 @@
-from typing import List
+from typing import List, Union
 
 import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
-from core import ChannelResults, Units, get_data_limits
+from core import ChannelResults, ResultsTable, Units
 
 
 def gen_combined_barcode(
-    results: List[ChannelResults],
+    results: Union[List[ChannelResults], ResultsTable],
     figpath: str,
     separate_channels: bool = True,
 ) -> None:
@@ -16,12 +16,15 @@ def gen_combined_barcode(
     Generate barcode visualization from structured ChannelResults.
 
     Args:
-        results: List of ChannelResults to visualize
+        results: ChannelResults, or a ResultsTable of them, to visualize
         figpath: Base path for output figures (without extension)
         sort_metric: Optional metric name to sort results by
         separate_channels: If True, create separate figures per channel
     """
-    if not results:
+    if not isinstance(results, ResultsTable):
+        results = ResultsTable.from_channel_results(results)
+
+    if len(results) == 0:
         return
 
     def format_header_with_units(header: str, unit: Units) -> str:
@@ -30,31 +33,18 @@ def gen_combined_barcode(
             return header
         return f"{header}\n({unit.value})"
 
-    # Convert structured results to array format (metrics only, no channel/flags)
-    data_arrays = [result.to_array(just_metrics=True) for result in results]
-
-    if not data_arrays:
-        return
-
-    data = (
-        np.vstack(data_arrays)
-        if len(data_arrays) > 1
-        else data_arrays[0].reshape(1, -1)
-    )
-
-    unique_channels = np.unique([result.channel for result in results])
-    unique_channels = unique_channels[~np.isnan(unique_channels)]
+    # Metrics only, no channel/flags
+    data = results.metrics
+    channels = results.channels
+    unique_channels = np.unique(channels)
 
     # Get headers and units from structured results
     headers = ChannelResults.get_headers(just_metrics=True)
     metrics = ChannelResults.get_metrics(just_metrics=True)
-    units = results[0].get_units(just_metrics=True)
+    units = ChannelResults.get_units(just_metrics=True)
     num_metrics = len(metrics)
 
-    limits = get_data_limits(data, metrics, units)
-
-    # Get channel info (needed for visualization)
-    channels = np.array([result.channel for result in results])
+    limits = results.get_data_limits()
 
     # Set up colormap
     norms = [mpl.colors.Normalize(vmin=limit[0], vmax=limit[1]) for limit in limits]